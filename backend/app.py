@@ -1,50 +1,123 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, abort, send_from_directory
 from flask_cors import CORS
 from flask_jwt_extended import JWTManager, create_access_token, jwt_required, get_jwt_identity
-from werkzeug.security import generate_password_hash, check_password_hash
+from werkzeug.security import generate_password_hash, check_password_hash, safe_join
 from werkzeug.utils import secure_filename
-from pymongo import MongoClient
 from bson import ObjectId
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import mimetypes
 import os
 import uuid
 from functools import wraps
+from cache import read_cache
+from compression import compressor
+from config import Config
+from database import pool_metrics
+from events import create_broker
+from follows import MAX_BATCH_FOLLOWS
+from querystats import begin_request, request_totals, query_stats
+from search import PREFIX_FIELD
+from serialization import BSONJSONProvider
+from uploads import UploadProcessor, cache_headers, is_image, remove_stored_file
+from utils import place_stored_file, stage_uploaded_file
+from models import (
+    UserModel, ProjectModel, StarModel, MessageModel, ConversationModel, FollowModel, FeedModel, UploadModel,
+    AUTHOR_PROJECTION, USER_VERSION_FIELDS, PROJECT_VERSION_FIELDS, document_version
+)
 
 app = Flask(__name__)
+app.json = BSONJSONProvider(app)
 app.config['JWT_SECRET_KEY'] = 'your-secret-key-change-in-production'
 app.config['JWT_ACCESS_TOKEN_EXPIRES'] = timedelta(days=7)
-app.config['UPLOAD_FOLDER'] = 'uploads'
+app.config['UPLOAD_FOLDER'] = Config.UPLOAD_FOLDER
 app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # 16MB max file size
 
 # Initialize extensions
 jwt = JWTManager(app)
 CORS(app)
 
-# MongoDB connection
-client = MongoClient('mongodb://localhost:27017/')
-db = client['devconnect']
-
-# Collections
-users_collection = db['users']
-projects_collection = db['projects']
-messages_collection = db['messages']
-conversations_collection = db['conversations']
-follows_collection = db['follows']
+# Push channel for new messages
+broker = create_broker(Config.EVENT_BROKER_URL, Config.WEB_CONCURRENCY)
 
 # Ensure upload directory exists
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
+def on_upload_processed(filename, variants, error):
+    """Record rendered variants and tell each waiting owner's open streams"""
+    for upload in UploadModel.finish_processing(filename, variants, error):
+        broker.publish([upload['ownerId']], 'upload', upload)
+
+# Image variants are rendered off the request thread
+upload_processor = UploadProcessor(
+    app.config['UPLOAD_FOLDER'],
+    Config.UPLOAD_URL_PREFIX,
+    workers=Config.UPLOAD_WORKERS,
+    on_complete=on_upload_processed,
+    manifest_path=Config.UPLOAD_MANIFEST
+)
+
+# Message history page sizes
+DEFAULT_MESSAGE_LIMIT = 50
+MAX_MESSAGE_LIMIT = 100
+
+# Following feed and trending page size cap
+MAX_FEED_LIMIT = 50
+
+# "Who to follow" list size cap
+MAX_SUGGESTION_LIMIT = 20
+
+# Tag list size cap
+MAX_TAG_LIMIT = 200
+
 # Helper functions
-def serialize_doc(doc):
-    """Convert MongoDB document to JSON serializable format"""
-    if doc is None:
-        return None
-    doc['_id'] = str(doc['_id'])
-    return doc
+def is_conditional():
+    """Whether the client sent validators worth checking before a full load"""
+    return bool(request.if_none_match) or request.if_modified_since is not None
+
+def not_modified(etag, last_modified=None):
+    """Whether the client's cached copy is still current"""
+    if request.if_none_match:
+        return request.if_none_match.contains_weak(etag)
+    if request.if_modified_since and last_modified:
+        return last_modified.replace(microsecond=0, tzinfo=timezone.utc) <= request.if_modified_since
+    return False
+
+def with_validators(response, etag, last_modified=None):
+    """Attach a weak ETag and Last-Modified, and make clients revalidate"""
+    response.set_etag(etag, weak=True)
+    if last_modified:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+def with_body_etag(response, private=False):
+    """Tag a response with a hash of its body, answering If-None-Match with 304"""
+    response.add_etag()
+    response.cache_control.no_cache = True
+    if private:
+        response.cache_control.private = True
+    return response.make_conditional(request)
 
-def serialize_docs(docs):
-    """Convert list of MongoDB documents to JSON serializable format"""
-    return [serialize_doc(doc) for doc in docs]
+# Data-access timing
+@app.before_request
+def start_query_timing():
+    begin_request()
+
+@app.after_request
+def compress_response(response):
+    if Config.COMPRESSION_ENABLED:
+        return compressor.compress_response(response, request.headers.get('Accept-Encoding'))
+    return response
+
+@app.after_request
+def add_server_timing(response):
+    """Report this request's model calls as a Server-Timing entry"""
+    totals = request_totals()
+    if totals and totals['queries']:
+        response.headers['Server-Timing'] = (
+            f'db;dur={totals["ms"]:.1f};desc="{totals["queries"]} queries"'
+        )
+    return response
 
 # Authentication routes
 @app.route('/api/auth/register', methods=['POST'])
@@ -59,7 +132,7 @@ def register():
                 return jsonify({'error': f'{field} is required'}), 400
         
         # Check if user already exists
-        if users_collection.find_one({'$or': [{'email': data['email']}, {'username': data['username']}]}):
+        if UserModel.exists_with_email_or_username(data['email'], data['username']):
             return jsonify({'error': 'User with this email or username already exists'}), 400
         
         # Create new user
@@ -82,14 +155,14 @@ def register():
             'isActive': True
         }
         
-        result = users_collection.insert_one(user_data)
-        user_data['_id'] = str(result.inserted_id)
+        user_data['_id'] = UserModel.create_user(user_data)
         
         # Create access token
-        access_token = create_access_token(identity=str(result.inserted_id))
+        access_token = create_access_token(identity=user_data['_id'])
         
         # Remove password from response
         del user_data['password']
+        del user_data[PREFIX_FIELD]
         
         return jsonify({
             'message': 'User registered successfully',
@@ -111,7 +184,7 @@ def login():
             return jsonify({'error': 'Email and password are required'}), 400
         
         # Find user
-        user = users_collection.find_one({'email': email})
+        user = UserModel.get_user_by_email(email)
         if not user or not check_password_hash(user['password'], password):
             return jsonify({'error': 'Invalid email or password'}), 401
         
@@ -119,7 +192,6 @@ def login():
         access_token = create_access_token(identity=str(user['_id']))
         
         # Remove password from response
-        user = serialize_doc(user)
         del user['password']
         
         return jsonify({
@@ -136,14 +208,11 @@ def login():
 def get_current_user():
     try:
         user_id = get_jwt_identity()
-        user = users_collection.find_one({'_id': ObjectId(user_id)})
+        user = UserModel.get_user_by_id(user_id)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        user = serialize_doc(user)
-        del user['password']
-        
         return jsonify({'user': user}), 200
         
     except Exception as e:
@@ -156,41 +225,59 @@ def get_users():
         page = int(request.args.get('page', 1))
         limit = int(request.args.get('limit', 10))
         search = request.args.get('search', '')
+        mode = request.args.get('mode', 'auto')
         
         skip = (page - 1) * limit
         
-        # Build query
-        query = {}
-        if search:
-            query['$or'] = [
-                {'fullName': {'$regex': search, '$options': 'i'}},
-                {'username': {'$regex': search, '$options': 'i'}},
-                {'skills': {'$regex': search, '$options': 'i'}}
-            ]
-        
-        # Get users
-        users = list(users_collection.find(query, {'password': 0}).skip(skip).limit(limit))
-        total = users_collection.count_documents(query)
+        try:
+            users, total, approximate, search_mode = UserModel.search_users(search, mode, skip, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
-            'users': serialize_docs(users),
+            'users': users,
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
+            'pages': (total + limit - 1) // limit,
+            'approximate': approximate,
+            'searchMode': search_mode
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/suggestions', methods=['GET'])
+@jwt_required()
+def get_suggestions():
+    try:
+        user_id = get_jwt_identity()
+        limit = min(int(request.args.get('limit', 10)), MAX_SUGGESTION_LIMIT)
+        users = UserModel.get_suggestions(user_id, limit)
+        return with_body_etag(jsonify({'users': users}), private=True)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/users/<username>', methods=['GET'])
 def get_user_by_username(username):
     try:
-        user = users_collection.find_one({'username': username}, {'password': 0})
+        # Answer revalidations from the version fields alone
+        if is_conditional():
+            version = UserModel.get_user_version(username)
+            if not version:
+                return jsonify({'error': 'User not found'}), 404
+            
+            etag, last_modified = document_version(version, USER_VERSION_FIELDS)
+            if not_modified(etag, last_modified):
+                return with_validators(app.response_class(status=304), etag, last_modified)
+        
+        user = UserModel.get_user_by_username(username)
         
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        return jsonify({'user': serialize_doc(user)}), 200
+        etag, last_modified = document_version(user, USER_VERSION_FIELDS)
+        return with_validators(jsonify({'user': user}), etag, last_modified), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -214,21 +301,15 @@ def update_user(user_id):
         if not update_data:
             return jsonify({'error': 'No valid fields to update'}), 400
         
-        # Update user
-        result = users_collection.update_one(
-            {'_id': ObjectId(user_id)},
-            {'$set': update_data}
-        )
+        # Update user, returning the new profile
+        user = UserModel.update_profile(user_id, update_data)
         
-        if result.matched_count == 0:
+        if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Get updated user
-        user = users_collection.find_one({'_id': ObjectId(user_id)}, {'password': 0})
-        
         return jsonify({
             'message': 'User updated successfully',
-            'user': serialize_doc(user)
+            'user': user
         }), 200
         
     except Exception as e:
@@ -243,54 +324,29 @@ def get_projects():
         search = request.args.get('search', '')
         tag = request.args.get('tag', '')
         author = request.args.get('author', '')
+        cursor = request.args.get('cursor', '')
+        mode = request.args.get('mode', 'auto')
         
         skip = (page - 1) * limit
         
-        # Build query
-        query = {}
-        if search:
-            query['$or'] = [
-                {'title': {'$regex': search, '$options': 'i'}},
-                {'description': {'$regex': search, '$options': 'i'}},
-                {'tags': {'$regex': search, '$options': 'i'}}
-            ]
-        
-        if tag and tag != 'All':
-            query['tags'] = {'$in': [tag]}
-        
-        if author:
-            query['author.username'] = author
-        
-        # Get projects with author info
-        pipeline = [
-            {'$match': query},
-            {'$lookup': {
-                'from': 'users',
-                'localField': 'authorId',
-                'foreignField': '_id',
-                'as': 'authorInfo'
-            }},
-            {'$unwind': '$authorInfo'},
-            {'$addFields': {
-                'author.name': '$authorInfo.fullName',
-                'author.username': '$authorInfo.username',
-                'author.avatar': '$authorInfo.avatar'
-            }},
-            {'$project': {'authorInfo': 0}},
-            {'$sort': {'createdAt': -1}},
-            {'$skip': skip},
-            {'$limit': limit}
-        ]
-        
-        projects = list(projects_collection.aggregate(pipeline))
-        total = projects_collection.count_documents(query)
+        try:
+            projects, total, approximate, search_mode, next_cursor = ProjectModel.list_projects(
+                tag, author, search, mode, cursor, skip, limit
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
-        return jsonify({
-            'projects': serialize_docs(projects),
+        payload = {
+            'projects': projects,
             'total': total,
             'page': page,
-            'pages': (total + limit - 1) // limit
-        }), 200
+            'pages': (total + limit - 1) // limit,
+            'approximate': approximate,
+            'nextCursor': next_cursor,
+            'searchMode': search_mode
+        }
+        
+        return with_body_etag(jsonify(payload))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -309,7 +365,7 @@ def create_project():
                 return jsonify({'error': f'{field} is required'}), 400
         
         # Get user info
-        user = users_collection.find_one({'_id': ObjectId(user_id)})
+        user = UserModel.get_user_by_id(user_id, AUTHOR_PROJECTION)
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
@@ -333,14 +389,13 @@ def create_project():
             'updatedAt': datetime.utcnow()
         }
         
-        result = projects_collection.insert_one(project_data)
-        project_data['_id'] = str(result.inserted_id)
+        project_data['_id'] = ProjectModel.create_project(project_data)
         
         # Update user's project count
-        users_collection.update_one(
-            {'_id': ObjectId(user_id)},
-            {'$inc': {'projects': 1}}
-        )
+        UserModel.increment_counter(user_id, 'projects', 1)
+        
+        # Push into followers' feeds
+        FeedModel.fan_out_project(project_data, user.get('followers', 0))
         
         return jsonify({
             'message': 'Project created successfully',
@@ -350,23 +405,59 @@ def create_project():
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+@app.route('/api/tags', methods=['GET'])
+def get_tags():
+    try:
+        limit = min(int(request.args.get('limit', 50)), MAX_TAG_LIMIT)
+        tags, total = ProjectModel.get_tag_counts(limit)
+        
+        # The total backs the frontend's 'All' entry
+        return with_body_etag(jsonify({'tags': tags, 'total': total}))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/projects/trending', methods=['GET'])
+def get_trending_projects():
+    try:
+        limit = min(int(request.args.get('limit', 10)), MAX_FEED_LIMIT)
+        projects = ProjectModel.get_trending(limit)
+        return with_body_etag(jsonify({'projects': projects}))
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 @app.route('/api/projects/<project_id>', methods=['GET'])
 def get_project(project_id):
     try:
-        project = projects_collection.find_one({'_id': ObjectId(project_id)})
+        # Answer revalidations from the version fields alone; the view still counts
+        if is_conditional():
+            version = ProjectModel.get_project_version(project_id)
+            if not version:
+                return jsonify({'error': 'Project not found'}), 404
+            
+            etag, last_modified = document_version(version, PROJECT_VERSION_FIELDS)
+            if not_modified(etag, last_modified):
+                ProjectModel.record_view(project_id)
+                return with_validators(app.response_class(status=304), etag, last_modified)
+        
+        project = ProjectModel.get_project_and_record_view(project_id)
         
         if not project:
             return jsonify({'error': 'Project not found'}), 404
         
-        # Increment view count
-        projects_collection.update_one(
-            {'_id': ObjectId(project_id)},
-            {'$inc': {'views': 1}}
-        )
+        etag, last_modified = document_version(project, PROJECT_VERSION_FIELDS)
+        return with_validators(jsonify({'project': project}), etag, last_modified), 200
         
-        project['views'] += 1
-        
-        return jsonify({'project': serialize_doc(project)}), 200
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/projects/<project_id>/related', methods=['GET'])
+def get_related_projects(project_id):
+    try:
+        limit = min(int(request.args.get('limit', Config.RELATED_TOP_K)), Config.RELATED_TOP_K)
+        projects = ProjectModel.get_related(project_id, limit)
+        return with_body_etag(jsonify({'projects': projects}))
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -377,48 +468,15 @@ def toggle_project_star(project_id):
     try:
         user_id = get_jwt_identity()
         
-        # Check if project exists
-        project = projects_collection.find_one({'_id': ObjectId(project_id)})
-        if not project:
+        result = StarModel.toggle_star(user_id, project_id)
+        if result is None:
             return jsonify({'error': 'Project not found'}), 404
         
-        # Check if user already starred this project
-        star_exists = db['stars'].find_one({
-            'userId': ObjectId(user_id),
-            'projectId': ObjectId(project_id)
-        })
-        
-        if star_exists:
-            # Remove star
-            db['stars'].delete_one({
-                'userId': ObjectId(user_id),
-                'projectId': ObjectId(project_id)
-            })
-            projects_collection.update_one(
-                {'_id': ObjectId(project_id)},
-                {'$inc': {'stars': -1}}
-            )
-            starred = False
-        else:
-            # Add star
-            db['stars'].insert_one({
-                'userId': ObjectId(user_id),
-                'projectId': ObjectId(project_id),
-                'createdAt': datetime.utcnow()
-            })
-            projects_collection.update_one(
-                {'_id': ObjectId(project_id)},
-                {'$inc': {'stars': 1}}
-            )
-            starred = True
-        
-        # Get updated project
-        updated_project = projects_collection.find_one({'_id': ObjectId(project_id)})
-        
+        starred, stars = result
         return jsonify({
             'message': 'Star toggled successfully',
             'starred': starred,
-            'stars': updated_project['stars']
+            'stars': stars
         }), 200
         
     except Exception as e:
@@ -434,65 +492,66 @@ def toggle_follow(user_id):
         if current_user_id == user_id:
             return jsonify({'error': 'Cannot follow yourself'}), 400
         
-        # Check if users exist
-        current_user = users_collection.find_one({'_id': ObjectId(current_user_id)})
-        target_user = users_collection.find_one({'_id': ObjectId(user_id)})
-        
-        if not current_user or not target_user:
+        following = FollowModel.toggle_follow(current_user_id, user_id)
+        if following is None:
             return jsonify({'error': 'User not found'}), 404
         
-        # Check if already following
-        follow_exists = follows_collection.find_one({
-            'followerId': ObjectId(current_user_id),
-            'followingId': ObjectId(user_id)
-        })
+        return jsonify({
+            'message': 'Follow status updated',
+            'following': following
+        }), 200
         
-        if follow_exists:
-            # Unfollow
-            follows_collection.delete_one({
-                'followerId': ObjectId(current_user_id),
-                'followingId': ObjectId(user_id)
-            })
-            
-            # Update counts
-            users_collection.update_one(
-                {'_id': ObjectId(current_user_id)},
-                {'$inc': {'following': -1}}
-            )
-            users_collection.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$inc': {'followers': -1}}
-            )
-            
-            following = False
-        else:
-            # Follow
-            follows_collection.insert_one({
-                'followerId': ObjectId(current_user_id),
-                'followingId': ObjectId(user_id),
-                'createdAt': datetime.utcnow()
-            })
-            
-            # Update counts
-            users_collection.update_one(
-                {'_id': ObjectId(current_user_id)},
-                {'$inc': {'following': 1}}
-            )
-            users_collection.update_one(
-                {'_id': ObjectId(user_id)},
-                {'$inc': {'followers': 1}}
-            )
-            
-            following = True
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/follows/batch', methods=['POST'])
+@jwt_required()
+def batch_follow():
+    try:
+        current_user_id = get_jwt_identity()
+        data = request.get_json()
+        
+        user_ids = data.get('userIds')
+        if not user_ids or not isinstance(user_ids, list):
+            return jsonify({'error': 'userIds must be a non-empty list'}), 400
+        
+        if len(user_ids) > MAX_BATCH_FOLLOWS:
+            return jsonify({'error': f'Cannot follow more than {MAX_BATCH_FOLLOWS} users at once'}), 400
+        
+        result = FollowModel.follow_many(current_user_id, user_ids)
+        if result is None:
+            return jsonify({'error': 'User not found'}), 404
         
         return jsonify({
             'message': 'Follow status updated',
-            'following': following
+            **{key: [str(target_id) for target_id in ids] for key, ids in result.items()}
         }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Feed routes
+@app.route('/api/feed', methods=['GET'])
+@jwt_required()
+def get_feed():
+    try:
+        user_id = get_jwt_identity()
+        limit = min(int(request.args.get('limit', 12)), MAX_FEED_LIMIT)
+        cursor = request.args.get('cursor', '')
+        
+        try:
+            projects, next_cursor = FeedModel.get_feed(user_id, cursor, limit)
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+        
+        return with_body_etag(jsonify({
+            'projects': projects,
+            'nextCursor': next_cursor
+        }), private=True)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
 # Messaging routes
 @app.route('/api/conversations', methods=['GET'])
 @jwt_required()
@@ -500,32 +559,9 @@ def get_conversations():
     try:
         user_id = get_jwt_identity()
         
-        # Get conversations for the user
-        pipeline = [
-            {'$match': {'participants': ObjectId(user_id)}},
-            {'$lookup': {
-                'from': 'users',
-                'localField': 'participants',
-                'foreignField': '_id',
-                'as': 'participantInfo'
-            }},
-            {'$addFields': {
-                'otherParticipant': {
-                    '$arrayElemAt': [
-                        {'$filter': {
-                            'input': '$participantInfo',
-                            'cond': {'$ne': ['$$this._id', ObjectId(user_id)]}
-                        }},
-                        0
-                    ]
-                }
-            }},
-            {'$sort': {'lastMessageAt': -1}}
-        ]
-        
-        conversations = list(conversations_collection.aggregate(pipeline))
-        
-        return jsonify({'conversations': serialize_docs(conversations)}), 200
+        conversations = ConversationModel.get_user_conversations(user_id)
+        
+        return with_body_etag(jsonify({'conversations': conversations}), private=True)
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -545,23 +581,15 @@ def create_conversation():
             return jsonify({'error': 'Cannot create conversation with yourself'}), 400
         
         # Check if conversation already exists
-        existing_conversation = conversations_collection.find_one({
-            'participants': {'$all': [ObjectId(user_id), ObjectId(participant_id)]}
-        })
+        existing_conversation = ConversationModel.find_between(user_id, participant_id)
         
         if existing_conversation:
-            return jsonify({'conversation': serialize_doc(existing_conversation)}), 200
+            return jsonify({'conversation': existing_conversation}), 200
         
         # Create new conversation
-        conversation_data = {
-            'participants': [ObjectId(user_id), ObjectId(participant_id)],
-            'createdAt': datetime.utcnow(),
-            'lastMessageAt': datetime.utcnow(),
-            'lastMessage': ''
-        }
-        
-        result = conversations_collection.insert_one(conversation_data)
-        conversation_data['_id'] = str(result.inserted_id)
+        conversation_data = ConversationModel.create_conversation([user_id, participant_id])
+        if not conversation_data:
+            return jsonify({'error': 'User not found'}), 404
         
         return jsonify({
             'message': 'Conversation created successfully',
@@ -577,21 +605,27 @@ def get_messages(conversation_id):
     try:
         user_id = get_jwt_identity()
         
-        # Verify user is part of the conversation
-        conversation = conversations_collection.find_one({
-            '_id': ObjectId(conversation_id),
-            'participants': ObjectId(user_id)
-        })
+        limit = min(int(request.args.get('limit', DEFAULT_MESSAGE_LIMIT)), MAX_MESSAGE_LIMIT)
+        before = request.args.get('before')
+        # 'since' is the polling spelling of 'after'
+        after = request.args.get('after') or request.args.get('since')
         
-        if not conversation:
+        if before and after:
+            return jsonify({'error': 'Use either before or after/since, not both'}), 400
+        
+        # Verify user is part of the conversation
+        if not ConversationModel.get_for_participant(conversation_id, user_id):
             return jsonify({'error': 'Conversation not found'}), 404
         
-        # Get messages
-        messages = list(messages_collection.find({
-            'conversationId': ObjectId(conversation_id)
-        }).sort('createdAt', 1))
+        result = MessageModel.get_conversation_messages(conversation_id, before, after, limit)
+        if result is None:
+            return jsonify({'error': 'Message not found'}), 404
         
-        return jsonify({'messages': serialize_docs(messages)}), 200
+        messages, has_more = result
+        return jsonify({
+            'messages': messages,
+            'hasMore': has_more
+        }), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -608,16 +642,15 @@ def send_message(conversation_id):
             return jsonify({'error': 'Message content is required'}), 400
         
         # Verify user is part of the conversation
-        conversation = conversations_collection.find_one({
-            '_id': ObjectId(conversation_id),
-            'participants': ObjectId(user_id)
-        })
+        conversation = ConversationModel.get_for_participant(
+            conversation_id, user_id, {'participants': 1}
+        )
         
         if not conversation:
             return jsonify({'error': 'Conversation not found'}), 404
         
         # Get sender info
-        sender = users_collection.find_one({'_id': ObjectId(user_id)})
+        sender = UserModel.get_user_by_id(user_id, {'fullName': 1})
         
         # Create message
         message_data = {
@@ -629,19 +662,20 @@ def send_message(conversation_id):
             'isRead': False
         }
         
-        result = messages_collection.insert_one(message_data)
-        message_data['_id'] = str(result.inserted_id)
+        message_data['_id'] = MessageModel.create_message(message_data)
         
         # Update conversation
-        conversations_collection.update_one(
-            {'_id': ObjectId(conversation_id)},
-            {
-                '$set': {
-                    'lastMessage': content,
-                    'lastMessageAt': datetime.utcnow()
-                }
-            }
-        )
+        last_message_at = datetime.utcnow()
+        ConversationModel.record_message(conversation_id, content, last_message_at)
+        
+        # Push to every participant's open streams
+        participants = conversation['participants']
+        broker.publish(participants, 'message', message_data)
+        broker.publish(participants, 'conversation', {
+            '_id': conversation_id,
+            'lastMessage': content,
+            'lastMessageAt': last_message_at
+        })
         
         return jsonify({
             'message': 'Message sent successfully',
@@ -651,6 +685,162 @@ def send_message(conversation_id):
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
+# Upload routes
+@app.route('/api/uploads', methods=['POST'])
+@jwt_required()
+def create_upload():
+    try:
+        user_id = get_jwt_identity()
+        
+        file = request.files.get('file')
+        if not file or not file.filename:
+            return jsonify({'error': 'file is required'}), 400
+        
+        # Hash while streaming to disk; resizing happens after the response
+        staged = stage_uploaded_file(file, app.config['UPLOAD_FOLDER'], Config.ALLOWED_EXTENSIONS)
+        if not staged:
+            return jsonify({'error': 'File type not allowed'}), 400
+        filename, temp_path = staged
+        
+        image = is_image(filename)
+        upload_data = {
+            'ownerId': ObjectId(user_id),
+            'filename': filename,
+            'originalName': file.filename,
+            'contentType': file.mimetype,
+            'size': os.path.getsize(temp_path),
+            'url': Config.UPLOAD_URL_PREFIX + filename,
+            'status': 'processing' if image else 'ready',
+            'variants': {},
+            'createdAt': datetime.utcnow()
+        }
+        
+        # Record the upload before taking a reference so a render finishing
+        # in between still finds it waiting
+        try:
+            upload_data['_id'] = UploadModel.create_upload(upload_data)
+            blob, created = UploadModel.acquire_blob(filename, upload_data['status'])
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        
+        # Stored only once referenced: a delete of the last reference to the
+        # same bytes running now either sees this one and keeps its files, or
+        # finishes first and this copy replaces them
+        place_stored_file(temp_path, app.config['UPLOAD_FOLDER'], filename)
+        
+        if image and created:
+            upload_processor.submit(filename)
+        elif created:
+            upload_processor.refresh_manifest(filename)
+        elif blob['status'] != upload_data['status']:
+            # Same bytes were uploaded before: reuse their variants
+            upload_data.update(UploadModel.copy_blob_result(upload_data['_id'], blob))
+        
+        return jsonify({
+            'message': 'File uploaded successfully',
+            'upload': upload_data
+        }), 202 if upload_data['status'] == 'processing' else 201
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['GET'])
+@jwt_required()
+def get_upload(upload_id):
+    try:
+        user_id = get_jwt_identity()
+        upload = UploadModel.get_upload(upload_id, user_id)
+        
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        return jsonify({'upload': upload}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/uploads/<upload_id>', methods=['DELETE'])
+@jwt_required()
+def delete_upload(upload_id):
+    try:
+        user_id = get_jwt_identity()
+        upload = UploadModel.delete_upload(upload_id, user_id)
+        
+        if not upload:
+            return jsonify({'error': 'Upload not found'}), 404
+        
+        # Files go with the last upload that references them, unless the
+        # same bytes are uploaded again while they are being removed
+        filename = upload['filename']
+        if UploadModel.release_blob(filename):
+            remove_stored_file(
+                app.config['UPLOAD_FOLDER'], filename, still_needed=lambda: UploadModel.blob_exists(filename)
+            )
+            upload_processor.refresh_manifest(filename)
+        
+        return jsonify({'message': 'Upload deleted successfully'}), 200
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@app.route(Config.UPLOAD_URL_PREFIX + '<path:filename>', methods=['GET'])
+def serve_upload(filename):
+    """Serve a stored file without reading it into memory
+
+    Range and conditional requests are answered by send_file; gthread
+    gunicorn sends full bodies with sendfile(2), and asgi.py serves this
+    route on the event loop instead. Content-addressed names never change
+    contents, so they are cached as immutable.
+    """
+    max_age, etag = cache_headers(filename)
+    
+    if Config.UPLOAD_ACCEL_REDIRECT:
+        # nginx streams the file from an internal location
+        if safe_join(app.config['UPLOAD_FOLDER'], filename) is None:
+            abort(404)
+        response = Response(mimetype=mimetypes.guess_type(filename)[0] or 'application/octet-stream')
+        response.headers['X-Accel-Redirect'] = Config.UPLOAD_ACCEL_REDIRECT + filename
+        if max_age is None:
+            response.cache_control.no_cache = True
+        else:
+            response.cache_control.public = True
+            response.cache_control.max_age = max_age
+    else:
+        response = send_from_directory(
+            os.path.abspath(app.config['UPLOAD_FOLDER']), filename, max_age=max_age, etag=etag
+        )
+    
+    if max_age is not None:
+        response.cache_control.immutable = True
+    return response
+
+# Push channel
+@app.route('/api/events', methods=['GET'])
+@jwt_required(locations=['headers', 'query_string'])
+def stream_events():
+    """Server-Sent Events stream of new messages and inbox updates
+
+    EventSource cannot send headers, so the token may be passed as ?jwt=.
+    Here each open stream holds a request thread; asgi.py serves this route
+    on the event loop instead, which is how production runs it.
+    """
+    subscription = broker.subscribe(get_jwt_identity())
+    return Response(subscription.stream(), mimetype='text/event-stream', headers={
+        'Cache-Control': 'no-cache',
+        'X-Accel-Buffering': 'no'
+    })
+
+# Metrics
+@app.route('/api/metrics', methods=['GET'])
+def get_metrics():
+    return jsonify({
+        'mongoPool': pool_metrics.snapshot(),
+        'queries': query_stats.snapshot(),
+        'cache': read_cache.stats(),
+        'compression': compressor.stats()
+    }), 200
+
 # Health check
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -0,0 +1,384 @@
+"""ASGI entry point
+
+Requests are matched against the Flask app's own route table. The list
+endpoints in ASYNC_VIEWS run natively on the event loop against Motor, so
+independent queries overlap and a slow Mongo round trip does not block a
+worker, and /api/events streams and stored file downloads are held on the
+loop without a thread each. Every other endpoint is served by the Flask
+app through the WSGI adapter, one request per thread of a WSGI_THREADS
+pool. That includes
+single-document reads such as profiles and project pages, whose read cache
+and conditional GET handling live in the Flask views.
+
+    WEB_CONCURRENCY=4 EVENT_BROKER_URL=redis://... uvicorn asgi:application
+"""
+import asyncio
+import mimetypes
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qsl
+from asgiref.sync import sync_to_async
+from asgiref.wsgi import WsgiToAsgi, WsgiToAsgiInstance
+from flask_jwt_extended import decode_token
+from motor.motor_asyncio import AsyncIOMotorClient
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import generate_etag, http_date, parse_date, parse_etags, parse_range_header, quote_etag
+from werkzeug.security import safe_join
+from app import app as flask_app, broker
+from models import project_list_query, project_list_pipeline, page_with_cursor, USER_PUBLIC_PROJECTION
+from compression import compressor
+from config import Config
+from database import client_options
+from counts import count_cache
+from search import resolve_search_async, text_score_projection, text_score_sort
+from serialization import dumps
+from uploads import cache_headers
+
+# Bytes read per chunk when a server cannot send files itself
+UPLOAD_CHUNK_SIZE = 256 * 1024
+
+# asgiref runs WSGI apps thread_sensitive by default, which funnels every
+# request through one shared thread
+_wsgi_executor = ThreadPoolExecutor(max_workers=Config.WSGI_THREADS, thread_name_prefix='wsgi')
+
+class PooledWsgiToAsgiInstance(WsgiToAsgiInstance):
+    run_wsgi_app = sync_to_async(
+        WsgiToAsgiInstance.__dict__['run_wsgi_app'].func, thread_sensitive=False, executor=_wsgi_executor
+    )
+
+class PooledWsgiToAsgi(WsgiToAsgi):
+    """WsgiToAsgi running each request on its own pool thread"""
+
+    async def __call__(self, scope, receive, send):
+        await PooledWsgiToAsgiInstance(self.wsgi_application)(scope, receive, send)
+
+wsgi_application = PooledWsgiToAsgi(flask_app)
+
+_client = None
+
+def get_db():
+    """Motor database, created on first use so it binds to the running loop"""
+    global _client
+    if _client is None:
+        _client = AsyncIOMotorClient(Config.MONGO_URI, **client_options())
+    return _client.get_default_database(Config.MONGO_DB_NAME)
+
+async def send_json(send, body, status=200, request_headers=None, tag=False):
+    """Write a JSON response with the same CORS header Flask-CORS adds
+
+    With tag=True a 200 is handled as with_body_etag() does in app.py: it
+    carries a hash of the body as its ETag and must be revalidated, and a
+    matching If-None-Match is answered with a bodiless 304.
+    """
+    request_headers = request_headers or {}
+    payload = dumps(body)
+    headers = [
+        (b'content-type', b'application/json'),
+        (b'access-control-allow-origin', b'*'),
+        (b'vary', b'Accept-Encoding')
+    ]
+    etag = None
+    if tag and status == 200:
+        etag = generate_etag(payload)
+        headers.append((b'cache-control', b'no-cache'))
+        if_none_match = parse_etags(request_headers.get(b'if-none-match', b'').decode('latin-1') or None)
+        if if_none_match.contains_weak(etag):
+            status, payload = 304, b''
+
+    codec = None
+    if Config.COMPRESSION_ENABLED and status == 200:
+        accept_encoding = request_headers.get(b'accept-encoding', b'').decode('latin-1')
+        codec, payload = compressor.compress(payload, accept_encoding, cacheable=etag is not None)
+        if codec:
+            headers.append((b'content-encoding', codec.encode()))
+    if etag:
+        # The compressed bytes differ, so only a weak validator still holds
+        headers.append((b'etag', quote_etag(etag, weak=codec is not None).encode()))
+    if status != 304:
+        headers.append((b'content-length', str(len(payload)).encode()))
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': headers
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+async def wait_for_disconnect(receive):
+    while (await receive())['type'] != 'http.disconnect':
+        pass
+
+# Async views
+async def get_projects(args):
+    db = get_db()
+    projects_collection = db['projects']
+    page = int(args.get('page', 1))
+    limit = int(args.get('limit', 12))
+    search = args.get('search', '')
+    cursor = args.get('cursor', '')
+    mode = args.get('mode', 'auto')
+    skip = (page - 1) * limit
+
+    query = project_list_query(args.get('tag', ''), args.get('author', ''))
+
+    search_mode = None
+    if search:
+        try:
+            search_mode, query, total, approximate = await resolve_search_async(
+                projects_collection, search, mode, query, count_cache.count_async
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+    try:
+        pipeline = project_list_pipeline(query, search_mode, cursor, skip, limit)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+
+    page_query = projects_collection.aggregate(pipeline).to_list(None)
+    if search:
+        projects = await page_query
+    else:
+        # The page and its total are independent; run them together
+        projects, (total, approximate) = await asyncio.gather(
+            page_query, count_cache.count_async(projects_collection, query)
+        )
+
+    projects, next_cursor = page_with_cursor(projects, limit, search_mode)
+    return {
+        'projects': projects,
+        'total': total,
+        'page': page,
+        'pages': (total + limit - 1) // limit,
+        'approximate': approximate,
+        'nextCursor': next_cursor,
+        'searchMode': search_mode
+    }, 200
+
+async def get_users(args):
+    users_collection = get_db()['users']
+    page = int(args.get('page', 1))
+    limit = int(args.get('limit', 10))
+    search = args.get('search', '')
+    mode = args.get('mode', 'auto')
+    skip = (page - 1) * limit
+
+    query = {}
+    search_mode = None
+    if search:
+        try:
+            search_mode, query, total, approximate = await resolve_search_async(
+                users_collection, search, mode, None, count_cache.count_async
+            )
+        except ValueError as e:
+            return {'error': str(e)}, 400
+
+    if search_mode == 'text':
+        cursor = users_collection.find(
+            query, {**USER_PUBLIC_PROJECTION, **text_score_projection()}
+        ).sort(text_score_sort())
+    else:
+        cursor = users_collection.find(query, USER_PUBLIC_PROJECTION)
+    page_query = cursor.skip(skip).limit(limit).to_list(None)
+
+    if search:
+        users = await page_query
+    else:
+        users, (total, approximate) = await asyncio.gather(
+            page_query, count_cache.count_async(users_collection, query)
+        )
+
+    return {
+        'users': users,
+        'total': total,
+        'page': page,
+        'pages': (total + limit - 1) // limit,
+        'approximate': approximate,
+        'searchMode': search_mode
+    }, 200
+
+# Stored files
+def upload_validators(filename, stat):
+    """(etag, Cache-Control) for a stored file, as serve_upload() sets them"""
+    max_age, etag = cache_headers(filename)
+    if max_age is None:
+        return f'{stat.st_mtime_ns:x}-{stat.st_size:x}', b'no-cache'
+    return etag, f'public, max-age={max_age}, immutable'.encode()
+
+def requested_range(headers, etag, size):
+    """(start, stop) of a satisfiable single Range, None for the whole file
+
+    Raises ValueError when the range cannot be served. A stale If-Range
+    asks for the whole file.
+    """
+    byte_range = parse_range_header(headers.get(b'range', b'').decode('latin-1') or None)
+    if byte_range is None:
+        return None
+    if_range = headers.get(b'if-range', b'').decode('latin-1')
+    if if_range and not parse_etags(if_range).contains(etag):
+        return None
+    span = byte_range.range_for_length(size)
+    if span is None:
+        raise ValueError('Range not satisfiable')
+    return span
+
+async def send_upload(scope, receive, send, filename):
+    """Serve a stored file from the event loop, as serve_upload() does
+
+    The body goes out with the server's zero-copy send when it offers the
+    http.response.zerocopysend extension, otherwise in chunks read on a
+    thread, so a download never holds a WSGI thread. Returns False to leave
+    missing files to the Flask view.
+    """
+    path = safe_join(os.path.abspath(Config.UPLOAD_FOLDER), filename)
+    try:
+        file = open(path, 'rb') if path else None
+    except (FileNotFoundError, IsADirectoryError):
+        file = None
+    if file is None:
+        return False
+
+    with file:
+        stat = os.fstat(file.fileno())
+        etag, cache_control = upload_validators(filename, stat)
+        headers = dict(scope['headers'])
+        response_headers = [
+            (b'content-type', (mimetypes.guess_type(filename)[0] or 'application/octet-stream').encode()),
+            (b'cache-control', cache_control),
+            (b'etag', quote_etag(etag).encode()),
+            (b'last-modified', http_date(stat.st_mtime).encode()),
+            (b'accept-ranges', b'bytes'),
+            (b'access-control-allow-origin', b'*')
+        ]
+
+        if_none_match = headers.get(b'if-none-match', b'').decode('latin-1')
+        if_modified_since = parse_date(headers.get(b'if-modified-since', b'').decode('latin-1') or None)
+        if (parse_etags(if_none_match).contains_weak(etag) if if_none_match
+                else if_modified_since is not None and int(stat.st_mtime) <= if_modified_since.timestamp()):
+            await send({'type': 'http.response.start', 'status': 304, 'headers': response_headers})
+            await send({'type': 'http.response.body'})
+            return True
+
+        try:
+            span = requested_range(headers, etag, stat.st_size)
+        except ValueError:
+            response_headers.append((b'content-range', f'bytes */{stat.st_size}'.encode()))
+            await send({'type': 'http.response.start', 'status': 416, 'headers': response_headers})
+            await send({'type': 'http.response.body'})
+            return True
+
+        status, (start, stop) = (200, (0, stat.st_size)) if span is None else (206, span)
+        if status == 206:
+            response_headers.append((b'content-range', f'bytes {start}-{stop - 1}/{stat.st_size}'.encode()))
+        response_headers.append((b'content-length', str(stop - start).encode()))
+        await send({'type': 'http.response.start', 'status': status, 'headers': response_headers})
+
+        if 'http.response.zerocopysend' in scope.get('extensions', {}):
+            await send({'type': 'http.response.zerocopysend', 'file': file, 'offset': start, 'count': stop - start})
+            return True
+
+        remaining = stop - start
+        file.seek(start)
+        disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+        try:
+            while remaining > 0 and not disconnected.done():
+                chunk = await asyncio.to_thread(file.read, min(UPLOAD_CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                await send({'type': 'http.response.body', 'body': chunk, 'more_body': remaining > 0})
+            if remaining > 0 and not disconnected.done():
+                # The file shrank underneath us; end the body rather than hang
+                await send({'type': 'http.response.body'})
+        finally:
+            disconnected.cancel()
+    return True
+
+# Push channel
+def event_identity(scope, args):
+    """User id from a Bearer header or ?jwt=, as the Flask route accepts"""
+    token = args.get(flask_app.config['JWT_QUERY_STRING_NAME'])
+    authorization = dict(scope['headers']).get(b'authorization', b'').decode('latin-1')
+    if authorization.startswith('Bearer '):
+        token = authorization[len('Bearer '):]
+    if not token:
+        raise ValueError('Missing JWT in headers or query_string')
+    with flask_app.app_context():
+        return decode_token(token)[flask_app.config['JWT_IDENTITY_CLAIM']]
+
+async def stream_events(scope, receive, send, args):
+    """Server-Sent Events stream of new messages and inbox updates"""
+    try:
+        identity = event_identity(scope, args)
+    except Exception as e:
+        await send_json(send, {'msg': str(e)}, 401)
+        return
+
+    frames = broker.subscribe_async(identity).stream()
+    disconnected = asyncio.ensure_future(wait_for_disconnect(receive))
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': 200,
+            'headers': [
+                (b'content-type', b'text/event-stream; charset=utf-8'),
+                (b'cache-control', b'no-cache'),
+                (b'x-accel-buffering', b'no'),
+                (b'access-control-allow-origin', b'*')
+            ]
+        })
+        while True:
+            next_frame = asyncio.ensure_future(frames.__anext__())
+            await asyncio.wait({next_frame, disconnected}, return_when=asyncio.FIRST_COMPLETED)
+            if not next_frame.done():
+                next_frame.cancel()
+                await asyncio.gather(next_frame, return_exceptions=True)
+                break
+            try:
+                frame = next_frame.result()
+            except StopAsyncIteration:
+                break
+            await send({'type': 'http.response.body', 'body': frame.encode(), 'more_body': True})
+        if not disconnected.done():
+            await send({'type': 'http.response.body'})
+    finally:
+        disconnected.cancel()
+        await frames.aclose()
+
+# Flask endpoint name -> native async implementation
+ASYNC_VIEWS = {
+    'get_projects': get_projects,
+    'get_users': get_users
+}
+
+# Views whose Flask versions return with_body_etag()
+BODY_ETAG_VIEWS = {'get_projects'}
+
+async def application(scope, receive, send):
+    if scope['type'] == 'http' and scope['method'] == 'GET':
+        try:
+            endpoint, view_args = flask_app.url_map.bind('localhost').match(
+                scope['path'], method=scope['method']
+            )
+        except HTTPException:
+            endpoint = None
+
+        if endpoint == 'stream_events':
+            await stream_events(scope, receive, send, dict(parse_qsl(scope['query_string'].decode())))
+            return
+
+        # With UPLOAD_ACCEL_REDIRECT set, the Flask view hands files to nginx
+        if endpoint == 'serve_upload' and not Config.UPLOAD_ACCEL_REDIRECT:
+            if await send_upload(scope, receive, send, view_args['filename']):
+                return
+
+        view = ASYNC_VIEWS.get(endpoint)
+        if view:
+            args = dict(parse_qsl(scope['query_string'].decode()))
+            try:
+                body, status = await view(args, **view_args)
+            except Exception as e:
+                body, status = {'error': str(e)}, 500
+            await send_json(send, body, status, dict(scope['headers']), tag=endpoint in BODY_ETAG_VIEWS)
+            return
+
+    await wsgi_application(scope, receive, send)
@@ -0,0 +1,63 @@
+"""Bandwidth and CPU per request with and without response compression
+
+    python bench_compression.py
+
+Serves a /api/projects-shaped page through the same after_request hook as
+app.py, once per Accept-Encoding, and reports bytes on the wire and CPU
+time per request. The "cached" rows repeat the request so the compressed
+body comes from the cache. No database is needed.
+"""
+import random
+import time
+from flask import Flask, request
+from bench_json import make_page
+from cache import MemoryCache
+from compression import Compressor
+from serialization import BSONJSONProvider
+
+REQUESTS = 200
+WORDS = ('react typescript mongodb flask python api realtime chat dashboard open source '
+         'developer portfolio analytics machine learning cli tool plugin editor').split()
+
+def make_app(compressor, page_size):
+    rng = random.Random(0)
+    page = make_page()[:page_size]
+    for doc in page:
+        doc['description'] = ' '.join(rng.choice(WORDS) for _ in range(40))
+
+    app = Flask(__name__)
+    app.json = BSONJSONProvider(app)
+
+    @app.route('/projects')
+    def projects():
+        response = app.json.response({'projects': page, 'total': len(page)})
+        response.add_etag()
+        return response
+
+    if compressor:
+        @app.after_request
+        def compress(response):
+            return compressor.compress_response(response, request.headers.get('Accept-Encoding'))
+    return app
+
+def measure(app, accept_encoding):
+    client = app.test_client()
+    size = 0
+    started = time.thread_time()
+    for _ in range(REQUESTS):
+        response = client.get('/projects', headers={'Accept-Encoding': accept_encoding})
+        size = len(response.data)
+    return size, (time.thread_time() - started) * 1000 / REQUESTS
+
+if __name__ == '__main__':
+    for page_size in (12, 50):
+        print(f'page of {page_size} projects')
+        size, cpu = measure(make_app(None, page_size), 'gzip, br, zstd')
+        print(f'  {"uncompressed":<16} {size:8d} bytes {cpu:6.2f} ms CPU/request')
+        for codec in ('gzip', 'br', 'zstd'):
+            uncached = make_app(Compressor(), page_size)
+            size, cpu = measure(uncached, codec)
+            print(f'  {codec:<16} {size:8d} bytes {cpu:6.2f} ms CPU/request')
+            cached = make_app(Compressor(cache=MemoryCache(ttl=300)), page_size)
+            size, cpu = measure(cached, codec)
+            print(f'  {codec + " (cached)":<16} {size:8d} bytes {cpu:6.2f} ms CPU/request')
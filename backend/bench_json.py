@@ -0,0 +1,60 @@
+"""Micro-benchmark of response encoding for one page of 1,000 projects
+
+    python bench_json.py
+
+Compares the old path (stringify _id per document, then Flask's default
+encoder) with dumps() on the stdlib and orjson backends.
+No database is needed; documents are shaped like the /api/projects feed.
+"""
+import timeit
+from datetime import datetime, timedelta
+from bson import ObjectId
+from flask import Flask
+from flask.json.provider import DefaultJSONProvider
+import serialization
+
+PAGE_SIZE = 1000
+REPEAT = 20
+
+def make_page():
+    now = datetime.utcnow()
+    return [{
+        '_id': ObjectId(),
+        'title': f'Project {i}',
+        'description': 'A collaborative tool for developers to share and discover projects. ' * 3,
+        'image': f'/uploads/{i}.webp',
+        'tags': ['React', 'TypeScript', 'MongoDB'],
+        'authorId': ObjectId(),
+        'author': {'name': 'Jane Developer', 'username': f'dev{i}', 'avatar': ''},
+        'demoUrl': 'https://example.com',
+        'githubUrl': 'https://github.com/example/project',
+        'stars': i % 97,
+        'views': i * 13,
+        'createdAt': now - timedelta(minutes=i),
+        'updatedAt': now - timedelta(minutes=i)
+    } for i in range(PAGE_SIZE)]
+
+def old_path(page):
+    # The old encoder cannot handle nested ObjectIds, so give it a head start
+    docs = [{**doc, '_id': str(doc['_id']), 'authorId': str(doc['authorId'])} for doc in page]
+    return old_provider.dumps({'projects': docs, 'total': PAGE_SIZE})
+
+def new_path(page):
+    return serialization.dumps({'projects': page, 'total': PAGE_SIZE})
+
+old_provider = DefaultJSONProvider(Flask(__name__))
+
+def run(name, func, page):
+    best = min(timeit.repeat(lambda: func(page), number=1, repeat=REPEAT))
+    print(f'{name:<28} {best * 1000:8.2f} ms')
+
+if __name__ == '__main__':
+    page = make_page()
+    orjson = serialization.orjson
+
+    run('serialize_docs + Flask', old_path, page)
+    serialization.orjson = None
+    run('dumps (stdlib json)', new_path, page)
+    serialization.orjson = orjson
+    if orjson:
+        run('dumps (orjson)', new_path, page)
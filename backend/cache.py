@@ -0,0 +1,179 @@
+import threading
+import time
+from collections import OrderedDict
+import bson
+from config import Config
+
+class ReadCache:
+    """Read-through cache of single documents, stored BSON-encoded
+
+    Every get returns a fresh copy, so callers may mutate what they get back.
+    Backends implement _fetch, _store, delete and clear.
+    """
+
+    def __init__(self, ttl=60):
+        self.ttl = ttl
+        self._stats_lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_load(self, key, loader):
+        """Return the cached document for key, calling loader() on a miss
+
+        Misses that load None are not cached.
+        """
+        raw = self._fetch(key)
+        self._count(raw is not None)
+        if raw is not None:
+            return bson.decode(raw)
+
+        doc = loader()
+        if doc is not None:
+            self._store(key, bson.encode(doc))
+        return doc
+
+    def get_or_load_bytes(self, key, loader):
+        """get_or_load() for values that are already bytes"""
+        raw = self._fetch(key)
+        self._count(raw is not None)
+        if raw is None:
+            raw = loader()
+            if raw is not None:
+                self._store(key, raw)
+        return raw
+
+    def _count(self, hit):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def stats(self):
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hitRate': self.hits / lookups if lookups else 0.0
+            }
+
+class MemoryCache(ReadCache):
+    """In-process LRU with a TTL and a byte budget"""
+
+    def __init__(self, ttl=60, max_bytes=32 * 1024 * 1024):
+        super().__init__(ttl)
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _fetch(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                self._remove(key)
+                return None
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def _store(self, key, raw):
+        if len(raw) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (raw, time.monotonic() + self.ttl)
+            self.bytes += len(raw)
+            while self.bytes > self.max_bytes:
+                _, (evicted, _) = self._entries.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[0])
+
+    def delete(self, *keys):
+        """Invalidate entries after a write"""
+        with self._lock:
+            for key in keys:
+                self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def stats(self):
+        stats = super().stats()
+        with self._lock:
+            stats.update({
+                'backend': 'memory',
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self.bytes,
+                'maxBytes': self.max_bytes
+            })
+        return stats
+
+class RedisCache(ReadCache):
+    """Cache shared by every worker through Redis
+
+    Entries expire after the TTL; the memory budget is the server's
+    maxmemory, with an allkeys-lru policy doing the evicting.
+    """
+
+    PREFIX = 'devconnect:cache:'
+
+    def __init__(self, url, ttl=60):
+        import redis  # optional dependency
+
+        super().__init__(ttl)
+        self._redis = redis.Redis.from_url(url)
+
+    def _fetch(self, key):
+        return self._redis.get(self.PREFIX + key)
+
+    def _store(self, key, raw):
+        self._redis.set(self.PREFIX + key, raw, ex=self.ttl)
+
+    def delete(self, *keys):
+        """Invalidate entries after a write"""
+        if keys:
+            self._redis.delete(*[self.PREFIX + key for key in keys])
+
+    def clear(self):
+        for key in self._redis.scan_iter(match=self.PREFIX + '*'):
+            self._redis.delete(key)
+
+    def stats(self):
+        stats = super().stats()
+        stats['backend'] = 'redis'
+        try:
+            info = self._redis.info()
+            stats.update({
+                'evictions': info.get('evicted_keys', 0),
+                'bytes': info.get('used_memory', 0),
+                'maxBytes': info.get('maxmemory', 0)
+            })
+        except Exception:
+            pass
+        return stats
+
+def create_cache(url=None, ttl=60, max_bytes=32 * 1024 * 1024):
+    """Use Redis when a cache URL is configured, otherwise stay in-process"""
+    if url:
+        return RedisCache(url, ttl=ttl)
+    return MemoryCache(ttl=ttl, max_bytes=max_bytes)
+
+read_cache = create_cache(Config.CACHE_URL, ttl=Config.CACHE_TTL, max_bytes=Config.CACHE_MAX_BYTES)
+
+def user_key(username):
+    return f'user:{username}'
+
+def project_key(project_id):
+    return f'project:{project_id}'
@@ -0,0 +1,133 @@
+import gzip
+import hashlib
+import threading
+import time
+from werkzeug.datastructures import Accept
+from werkzeug.http import parse_accept_header
+from cache import MemoryCache
+from config import Config
+
+try:
+    import brotli  # optional dependency
+except ImportError:
+    brotli = None
+
+try:
+    import zstandard  # optional dependency
+except ImportError:
+    zstandard = None
+
+# Media types worth compressing; images and uploads are already compressed
+COMPRESSIBLE_TYPES = {'application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript'}
+
+class Compressor:
+    """Content-Encoding negotiation with a cache of compressed bodies
+
+    Codecs are tried in order of preference (br, zstd, gzip) among those the
+    client accepts and whose package is installed. Compressed bodies of
+    cacheable responses are kept by codec and body hash, so a hot page is
+    only compressed once.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_level=5, zstd_level=3, cache=None):
+        self.min_size = min_size
+        self.cache = cache
+        self.codecs = {}
+        if brotli:
+            self.codecs['br'] = lambda body: brotli.compress(body, quality=brotli_level)
+        if zstandard:
+            zstd_compressor = threading.local()
+
+            def compress_zstd(body):
+                # ZstdCompressor instances are not thread-safe
+                if not hasattr(zstd_compressor, 'instance'):
+                    zstd_compressor.instance = zstandard.ZstdCompressor(level=zstd_level)
+                return zstd_compressor.instance.compress(body)
+            self.codecs['zstd'] = compress_zstd
+        self.codecs['gzip'] = lambda body: gzip.compress(body, compresslevel=gzip_level, mtime=0)
+
+        self._lock = threading.Lock()
+        self.responses = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_ms = 0.0
+
+    def negotiate(self, accept_encoding):
+        """Pick the preferred codec the client accepts, or None"""
+        accepted = parse_accept_header(accept_encoding or '', Accept)
+        for codec in self.codecs:
+            if accepted.quality(codec) > 0:
+                return codec
+        return None
+
+    def compress(self, body, accept_encoding, cacheable=False):
+        """Return (codec, compressed body), or (None, body) when not worth it"""
+        codec = self.negotiate(accept_encoding) if len(body) >= self.min_size else None
+        if codec is None:
+            return None, body
+
+        compress = self.codecs[codec]
+        if cacheable and self.cache is not None:
+            key = f'{codec}:{hashlib.blake2b(body, digest_size=16).hexdigest()}'
+            data = self.cache.get_or_load_bytes(key, lambda: self._timed(compress, body))
+        else:
+            data = self._timed(compress, body)
+
+        with self._lock:
+            self.responses += 1
+            self.bytes_in += len(body)
+            self.bytes_out += len(data)
+        return codec, data
+
+    def _timed(self, compress, body):
+        started = time.thread_time()
+        data = compress(body)
+        with self._lock:
+            self.cpu_ms += (time.thread_time() - started) * 1000
+        return data
+
+    def compress_response(self, response, accept_encoding):
+        """Compress a buffered Flask response in place when it qualifies"""
+        if response.mimetype not in COMPRESSIBLE_TYPES:
+            return response
+        response.vary.add('Accept-Encoding')
+        if (response.status_code != 200 or response.is_streamed or response.direct_passthrough
+                or 'Content-Encoding' in response.headers):
+            return response
+
+        # Only shared, validated representations are worth keeping compressed
+        etag, weak = response.get_etag()
+        cacheable = etag is not None and not response.cache_control.private
+        codec, data = self.compress(response.get_data(), accept_encoding, cacheable)
+        if codec is None:
+            return response
+
+        response.set_data(data)
+        response.headers['Content-Encoding'] = codec
+        # The compressed bytes differ, so only a weak validator still holds
+        if etag and not weak:
+            response.set_etag(etag, weak=True)
+        return response
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                'codecs': list(self.codecs),
+                'responses': self.responses,
+                'bytesIn': self.bytes_in,
+                'bytesOut': self.bytes_out,
+                'ratio': self.bytes_out / self.bytes_in if self.bytes_in else 0.0,
+                'cpuMs': self.cpu_ms
+            }
+        if self.cache is not None:
+            stats['cache'] = self.cache.stats()
+        return stats
+
+compressor = Compressor(
+    min_size=Config.COMPRESSION_MIN_SIZE,
+    gzip_level=Config.COMPRESSION_GZIP_LEVEL,
+    brotli_level=Config.COMPRESSION_BROTLI_LEVEL,
+    zstd_level=Config.COMPRESSION_ZSTD_LEVEL,
+    cache=MemoryCache(ttl=Config.COMPRESSION_CACHE_TTL, max_bytes=Config.COMPRESSION_CACHE_MAX_BYTES)
+    if Config.COMPRESSION_CACHE_MAX_BYTES else None
+)
@@ -11,11 +11,76 @@ class Config:
     
     # MongoDB settings
     MONGO_URI = os.environ.get('MONGO_URI') or 'mongodb://localhost:27017/devconnect'
+    MONGO_DB_NAME = os.environ.get('MONGO_DB_NAME') or 'devconnect'  # used when MONGO_URI names no database
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 100))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 2000))
+    MONGO_COMPRESSORS = os.environ.get('MONGO_COMPRESSORS', 'zstd,snappy,zlib').split(',')
+    MONGO_READ_PREFERENCE = os.environ.get('MONGO_READ_PREFERENCE', 'primary')
     
     # File upload settings
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
-    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'pdf', 'doc', 'docx'}
+    ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp', 'pdf', 'doc', 'docx'}
+    UPLOAD_URL_PREFIX = os.environ.get('UPLOAD_URL_PREFIX') or '/uploads/'
+    UPLOAD_WORKERS = int(os.environ.get('UPLOAD_WORKERS', 2))
+    # Internal nginx location to hand file bodies to via X-Accel-Redirect;
+    # empty serves them from the app (sendfile, or chunks under ASGI)
+    UPLOAD_ACCEL_REDIRECT = os.environ.get('UPLOAD_ACCEL_REDIRECT', '')
+    # Index of stored files for the proxy or CDN; keep it outside UPLOAD_FOLDER
+    # so it is not served
+    UPLOAD_MANIFEST = os.environ.get('UPLOAD_MANIFEST') or 'upload-manifest.json'
+    
+    # List total cache settings
+    COUNT_CACHE_TTL = int(os.environ.get('COUNT_CACHE_TTL', 30))
+    COUNT_CACHE_MAX_ENTRIES = int(os.environ.get('COUNT_CACHE_MAX_ENTRIES', 1024))
+    
+    # Profile and project read cache; set CACHE_URL (Redis) to share it across workers
+    CACHE_URL = os.environ.get('CACHE_URL')
+    CACHE_TTL = int(os.environ.get('CACHE_TTL', 60))
+    CACHE_MAX_BYTES = int(os.environ.get('CACHE_MAX_BYTES', 32 * 1024 * 1024))
+    
+    # Response compression; bodies under the minimum size are sent as-is
+    COMPRESSION_ENABLED = os.environ.get('COMPRESSION_ENABLED', 'true').lower() == 'true'
+    COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+    COMPRESSION_GZIP_LEVEL = int(os.environ.get('COMPRESSION_GZIP_LEVEL', 6))
+    COMPRESSION_BROTLI_LEVEL = int(os.environ.get('COMPRESSION_BROTLI_LEVEL', 5))
+    COMPRESSION_ZSTD_LEVEL = int(os.environ.get('COMPRESSION_ZSTD_LEVEL', 3))
+    COMPRESSION_CACHE_TTL = int(os.environ.get('COMPRESSION_CACHE_TTL', 300))
+    COMPRESSION_CACHE_MAX_BYTES = int(os.environ.get('COMPRESSION_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+    
+    # Following feed settings: authors with at least this many followers are
+    # merged into feeds at read time instead of fanned out on write
+    FEED_CELEBRITY_FOLLOWERS = int(os.environ.get('FEED_CELEBRITY_FOLLOWERS', 10000))
+    
+    # Trending ranking settings; `python trending.py` rescores changed
+    # projects every TRENDING_REFRESH_INTERVAL seconds
+    TRENDING_HALF_LIFE_HOURS = float(os.environ.get('TRENDING_HALF_LIFE_HOURS', 48))
+    TRENDING_REFRESH_INTERVAL = float(os.environ.get('TRENDING_REFRESH_INTERVAL', 60))
+    
+    # "Who to follow" settings for `python recommendations.py`
+    SUGGESTIONS_TOP_K = int(os.environ.get('SUGGESTIONS_TOP_K', 20))
+    RECOMMENDER_MEMORY_MB = int(os.environ.get('RECOMMENDER_MEMORY_MB', 1024))
+    
+    # Related projects kept per project
+    RELATED_TOP_K = int(os.environ.get('RELATED_TOP_K', 10))
+    
+    # Fraction of model calls whose results are encoded to report their size
+    # on /api/metrics; 1 measures every call, 0 none
+    QUERY_STATS_SAMPLE_RATE = float(os.environ.get('QUERY_STATS_SAMPLE_RATE', 0.01))
+    
+    # Project view counter settings
+    VIEW_COUNTER_BUFFERED = os.environ.get('VIEW_COUNTER_BUFFERED', 'true').lower() == 'true'
+    VIEW_FLUSH_INTERVAL = float(os.environ.get('VIEW_FLUSH_INTERVAL', 5))
+    
+    # Threads serving the Flask routes under the ASGI entry point
+    WSGI_THREADS = int(os.environ.get('WSGI_THREADS', 32))
+    
+    # Message push channel; leave unset for in-process pub/sub, which only
+    # reaches streams in the same worker process, so several workers warn
+    # at startup without it (uvicorn reads WEB_CONCURRENCY too)
+    EVENT_BROKER_URL = os.environ.get('EVENT_BROKER_URL')
+    WEB_CONCURRENCY = int(os.environ.get('WEB_CONCURRENCY', 1))
     
     # CORS settings
     CORS_ORIGINS = os.environ.get('CORS_ORIGINS', 'http://localhost:3000').split(',')
@@ -0,0 +1,76 @@
+import threading
+import time
+from collections import OrderedDict
+from bson import json_util
+from config import Config
+
+class CountCache:
+    """TTL cache of list totals keyed by collection and normalized query"""
+
+    def __init__(self, ttl=30, max_entries=1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(collection, query):
+        """Normalize a query so equivalent filters share one cache entry"""
+        return collection.name, json_util.dumps(query, sort_keys=True)
+
+    def count(self, collection, query):
+        """Return (total, approximate) for a query, hitting the database at most once per TTL"""
+        if not query:
+            # Collection metadata lookup, no scan
+            return collection.estimated_document_count(), True
+
+        key = self._key(collection, query)
+        total = self._get(key)
+        if total is not None:
+            return total, True
+
+        total = collection.count_documents(query)
+        self._put(key, total)
+        return total, False
+
+    async def count_async(self, collection, query):
+        """count() for an async (Motor) collection"""
+        if not query:
+            return await collection.estimated_document_count(), True
+
+        key = self._key(collection, query)
+        total = self._get(key)
+        if total is not None:
+            return total, True
+
+        total = await collection.count_documents(query)
+        self._put(key, total)
+        return total, False
+
+    def _get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[1] > time.monotonic():
+                self._entries.move_to_end(key)
+                return entry[0]
+        return None
+
+    def _put(self, key, total):
+        with self._lock:
+            self._entries[key] = (total, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, collection_name):
+        """Drop every cached total for a collection after a write"""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == collection_name]:
+                del self._entries[key]
+
+    def clear(self):
+        """Drop all cached totals"""
+        with self._lock:
+            self._entries.clear()
+
+count_cache = CountCache(ttl=Config.COUNT_CACHE_TTL, max_entries=Config.COUNT_CACHE_MAX_ENTRIES)
@@ -0,0 +1,136 @@
+import threading
+import time
+from importlib.util import find_spec
+from pymongo import MongoClient, monitoring
+from config import Config
+
+# Compressors and the optional package each one needs
+COMPRESSOR_PACKAGES = {'zstd': 'zstandard', 'snappy': 'snappy', 'zlib': None}
+
+# Upper bounds (ms) of the checkout wait histogram buckets
+WAIT_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000)
+
+class PoolMetrics(monitoring.ConnectionPoolListener):
+    """Connection pool checkout wait times, for sizing maxPoolSize"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._started = {}
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.failures = 0
+            self.total_wait_ms = 0.0
+            self.max_wait_ms = 0.0
+            self.buckets = [0] * (len(WAIT_BUCKETS_MS) + 1)
+            self.open_connections = 0
+
+    def _finish(self, failed):
+        started = self._started.pop(threading.get_ident(), None)
+        if started is None:
+            return
+        wait_ms = (time.perf_counter() - started) * 1000
+        with self._lock:
+            if failed:
+                self.failures += 1
+                return
+            self.checkouts += 1
+            self.total_wait_ms += wait_ms
+            self.max_wait_ms = max(self.max_wait_ms, wait_ms)
+            for i, bound in enumerate(WAIT_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.buckets[i] += 1
+                    break
+            else:
+                self.buckets[-1] += 1
+
+    # Checkout events fire on the thread doing the checkout
+    def connection_check_out_started(self, event):
+        self._started[threading.get_ident()] = time.perf_counter()
+
+    def connection_checked_out(self, event):
+        self._finish(failed=False)
+
+    def connection_check_out_failed(self, event):
+        self._finish(failed=True)
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open_connections += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open_connections -= 1
+
+    # Remaining pool events are not tracked
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_checked_in(self, event):
+        pass
+
+    def snapshot(self):
+        with self._lock:
+            labels = [f'le_{bound}ms' for bound in WAIT_BUCKETS_MS] + ['inf']
+            return {
+                'checkouts': self.checkouts,
+                'checkoutFailures': self.failures,
+                'avgWaitMs': self.total_wait_ms / self.checkouts if self.checkouts else 0.0,
+                'maxWaitMs': self.max_wait_ms,
+                'waitHistogram': dict(zip(labels, self.buckets)),
+                'openConnections': self.open_connections
+            }
+
+pool_metrics = PoolMetrics()
+
+def available_compressors(names):
+    """Keep the configured compressors whose optional package is installed"""
+    return [
+        name for name in names
+        if name in COMPRESSOR_PACKAGES
+        and (COMPRESSOR_PACKAGES[name] is None or find_spec(COMPRESSOR_PACKAGES[name]))
+    ]
+
+def client_options():
+    """MongoClient keyword arguments driven by Config"""
+    options = {
+        'maxPoolSize': Config.MONGO_MAX_POOL_SIZE,
+        'minPoolSize': Config.MONGO_MIN_POOL_SIZE,
+        'waitQueueTimeoutMS': Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        'readPreference': Config.MONGO_READ_PREFERENCE,
+        'event_listeners': [pool_metrics]
+    }
+    compressors = available_compressors(Config.MONGO_COMPRESSORS)
+    if compressors:
+        options['compressors'] = ','.join(compressors)
+    return options
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_client():
+    """The process-wide MongoClient; connects lazily so it is safe to create before fork"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = MongoClient(Config.MONGO_URI, connect=False, **client_options())
+    return _client
+
+def get_db():
+    """The application database named in MONGO_URI"""
+    return get_client().get_default_database(Config.MONGO_DB_NAME)
@@ -0,0 +1,185 @@
+import asyncio
+import json
+import queue
+import threading
+import warnings
+from serialization import dumps
+
+# Seconds between keep-alive comments on idle streams
+HEARTBEAT_INTERVAL = 15
+
+# Events buffered per subscriber before the stream is dropped
+SUBSCRIBER_QUEUE_SIZE = 100
+
+def encode_event(event, data):
+    """Format one Server-Sent Events frame"""
+    return f'event: {event}\ndata: {dumps(data).decode()}\n\n'
+
+class Subscription:
+    """A single client's event queue"""
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except queue.Full:
+            # A stalled client reconnects and catches up with ?since=
+            self.overflowed = True
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+    def stream(self):
+        """Yield SSE frames until the client disconnects or falls behind"""
+        try:
+            yield ': connected\n\n'
+            while not self.overflowed:
+                try:
+                    yield self.queue.get(timeout=HEARTBEAT_INTERVAL)
+                except queue.Empty:
+                    yield ': keep-alive\n\n'
+        finally:
+            self.close()
+
+class AsyncSubscription(Subscription):
+    """A client's event queue for a stream served on an asyncio loop
+
+    deliver() may be called from any thread; frames are handed to the loop,
+    so an idle stream holds no thread.
+    """
+
+    def __init__(self, broker, channel, loop):
+        self.broker = broker
+        self.channel = channel
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self.overflowed = False
+
+    def deliver(self, frame):
+        try:
+            self.loop.call_soon_threadsafe(self._put, frame)
+        except RuntimeError:
+            pass  # loop already closed
+
+    def _put(self, frame):
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.overflowed = True
+
+    async def stream(self):
+        """Yield SSE frames until the client disconnects or falls behind"""
+        try:
+            yield ': connected\n\n'
+            while not self.overflowed:
+                try:
+                    yield await asyncio.wait_for(self.queue.get(), HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ': keep-alive\n\n'
+        finally:
+            self.close()
+
+class InProcessBroker:
+    """Pub/sub within one process; each user id is a channel"""
+
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, channel):
+        return self._add(Subscription(self, str(channel)))
+
+    def subscribe_async(self, channel):
+        """Like subscribe(), for a stream served on the running event loop"""
+        return self._add(AsyncSubscription(self, str(channel), asyncio.get_running_loop()))
+
+    def _add(self, subscription):
+        with self._lock:
+            self._subscribers.setdefault(subscription.channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def publish(self, channels, event, data):
+        frame = encode_event(event, data)
+        with self._lock:
+            targets = [s for c in channels for s in self._subscribers.get(str(c), ())]
+        for subscription in targets:
+            subscription.deliver(frame)
+
+    def subscriber_count(self):
+        with self._lock:
+            return sum(len(s) for s in self._subscribers.values())
+
+class RedisBroker(InProcessBroker):
+    """Fans events out across worker processes through Redis pub/sub
+
+    Local delivery still goes through the in-process subscriber table; one
+    listener thread per process relays frames published by other workers.
+    """
+
+    CHANNEL = 'devconnect:events'
+
+    def __init__(self, url):
+        import redis  # optional dependency
+
+        super().__init__()
+        self._redis = redis.Redis.from_url(url)
+        self._thread = None
+
+    def _add(self, subscription):
+        # Start listening on first use so the thread lives in the worker, not a pre-fork master
+        with self._lock:
+            if self._thread is None:
+                pubsub = self._redis.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(**{self.CHANNEL: self._on_message})
+                self._thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        return super()._add(subscription)
+
+    def publish(self, channels, event, data):
+        frame = encode_event(event, data)
+        self._redis.publish(self.CHANNEL, json.dumps({
+            'channels': [str(c) for c in channels],
+            'frame': frame
+        }))
+
+    def _on_message(self, message):
+        payload = json.loads(message['data'])
+        with self._lock:
+            targets = [s for c in payload['channels'] for s in self._subscribers.get(c, ())]
+        for subscription in targets:
+            subscription.deliver(payload['frame'])
+
+def check_broker(url, processes):
+    """Warn when several worker processes would share in-process pub/sub
+
+    An event published in one process never reaches streams held by the
+    others, so live pushes only arrive when sender and recipient happen to
+    land on the same worker. Returns whether the setup is sound.
+    """
+    if processes > 1 and not url:
+        warnings.warn(
+            f'{processes} worker processes without EVENT_BROKER_URL (Redis): /api/events only '
+            'delivers messages sent through the same worker',
+            RuntimeWarning
+        )
+        return False
+    return True
+
+def create_broker(url=None, processes=1):
+    """Use Redis when a broker URL is configured, otherwise stay in-process"""
+    check_broker(url, processes)
+    if url:
+        return RedisBroker(url)
+    return InProcessBroker()
@@ -0,0 +1,177 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from utils import decode_cursor, encode_cursor, keyset_filter
+
+# Followers written per insert_many when fanning a project out
+FANOUT_BATCH_SIZE = 1000
+
+# Projects copied into a timeline when its owner follows someone new
+FOLLOW_BACKFILL = 20
+
+# Threads writing fan-outs after the create request has been answered
+FANOUT_WORKERS = 2
+
+class FeedService:
+    """Materialized "following" timelines
+
+    Each timeline entry is (userId, authorId, projectId, createdAt), with
+    createdAt copied from the project, so a feed page is one range scan on
+    (userId, createdAt, projectId) followed by an _id lookup of that page.
+    Projects by authors with celebrity_followers or more followers are not
+    fanned out; they are read from projects_collection and merged in.
+    Other fan-outs run on a small thread pool, started on first use so it
+    lives in the worker rather than a pre-fork master.
+    """
+
+    CELEBRITIES_KEY = 'feed:celebrities'
+
+    def __init__(self, users_collection, follows_collection, projects_collection, timelines_collection,
+                 celebrity_followers=10000, cache=None):
+        self.users = users_collection
+        self.follows = follows_collection
+        self.projects = projects_collection
+        self.timelines = timelines_collection
+        self.celebrity_followers = celebrity_followers
+        self.cache = cache
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=FANOUT_WORKERS, thread_name_prefix='fanout')
+        return self._executor
+
+    def shutdown(self, wait=True):
+        """Finish queued fan-outs and stop the pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+    def create_indexes(self):
+        self.timelines.create_index([("userId", 1), ("createdAt", -1), ("projectId", -1)])
+        self.timelines.create_index([("userId", 1), ("authorId", 1), ("projectId", 1)], unique=True)
+        self.users.create_index([("followers", -1)])
+
+    def _insert(self, entries):
+        """Insert timeline entries, skipping ones already there"""
+        if not entries:
+            return 0
+        try:
+            return len(self.timelines.insert_many(entries, ordered=False).inserted_ids)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') != 11000:
+                    raise
+            return e.details.get('nInserted', 0)
+
+    def fan_out(self, project, follower_count):
+        """Push a new project into its author's followers' timelines
+
+        Returns the number of timelines written, or None for a celebrity
+        author whose projects are merged in at read time.
+        """
+        if follower_count >= self.celebrity_followers:
+            return None
+
+        written = 0
+        batch = []
+        entry = {'authorId': project['authorId'], 'projectId': ObjectId(project['_id']),
+                 'createdAt': project['createdAt']}
+        for follow in self.follows.find({'followingId': project['authorId']}, {'followerId': 1, '_id': 0}):
+            batch.append({'userId': follow['followerId'], **entry})
+            if len(batch) == FANOUT_BATCH_SIZE:
+                written += self._insert(batch)
+                batch = []
+        return written + self._insert(batch)
+
+    def submit_fan_out(self, project, follower_count):
+        """Queue fan_out() on the background pool; returns its future"""
+        if follower_count >= self.celebrity_followers:
+            return None
+        project = {'_id': project['_id'], 'authorId': project['authorId'], 'createdAt': project['createdAt']}
+        return self._pool().submit(self.fan_out, project, follower_count)
+
+    def backfill(self, follower_id, author_ids, limit=FOLLOW_BACKFILL):
+        """Copy recent projects of newly followed authors into a timeline
+
+        One aggregation keeps each author's `limit` newest projects with
+        $topN (MongoDB 5.2+), however many authors were followed.
+        """
+        if not author_ids:
+            return 0
+        follower_id = ObjectId(follower_id)
+        groups = self.projects.aggregate([
+            {'$match': {'authorId': {'$in': [ObjectId(author_id) for author_id in author_ids]}}},
+            {'$group': {
+                '_id': '$authorId',
+                'recent': {'$topN': {
+                    'n': limit,
+                    'sortBy': {'createdAt': -1, '_id': -1},
+                    'output': {'projectId': '$_id', 'createdAt': '$createdAt'}
+                }}
+            }}
+        ])
+        entries = [{
+            'userId': follower_id,
+            'authorId': group['_id'],
+            'projectId': project['projectId'],
+            'createdAt': project['createdAt']
+        } for group in groups for project in group['recent']]
+        return self._insert(entries)
+
+    def remove_author(self, follower_id, author_id):
+        """Drop an unfollowed author's projects from a timeline"""
+        return self.timelines.delete_many({'userId': ObjectId(follower_id), 'authorId': ObjectId(author_id)})
+
+    def celebrity_ids(self):
+        """Ids of authors too popular to fan out, cached when a cache is set"""
+        def load():
+            users = self.users.find({'followers': {'$gte': self.celebrity_followers}}, {'_id': 1})
+            return {'ids': [user['_id'] for user in users]}
+
+        if self.cache is None:
+            return load()['ids']
+        return self.cache.get_or_load(self.CELEBRITIES_KEY, load)['ids']
+
+    def page(self, user_id, cursor='', limit=12, projection=None):
+        """Return (projects, next_cursor), newest first
+
+        Raises ValueError for a malformed cursor.
+        """
+        user_id = ObjectId(user_id)
+        seek = keyset_filter(*decode_cursor(cursor)) if cursor else {}
+
+        # Materialized part: one range scan of the user's timeline
+        timeline_seek = keyset_filter(*decode_cursor(cursor), id_field='projectId') if cursor else {}
+        entries = (self.timelines.find({'userId': user_id, **timeline_seek}, {'projectId': 1, 'createdAt': 1, '_id': 0})
+                   .sort([('createdAt', -1), ('projectId', -1)])
+                   .limit(limit + 1))
+        keys = [(entry['createdAt'], entry['projectId']) for entry in entries]
+
+        # Fan-out-on-read part: followed celebrities, bounded by how many exist
+        celebrities = self.celebrity_ids()
+        if celebrities:
+            followed = [follow['followingId'] for follow in self.follows.find(
+                {'followerId': user_id, 'followingId': {'$in': celebrities}}, {'followingId': 1, '_id': 0}
+            )]
+            if followed:
+                recent = (self.projects.find({'authorId': {'$in': followed}, **seek}, {'createdAt': 1})
+                          .sort([('createdAt', -1), ('_id', -1)])
+                          .limit(limit + 1))
+                keys += [(project['createdAt'], project['_id']) for project in recent]
+
+        # A project can come from both sides if its author crossed the threshold
+        keys = sorted(set(keys), reverse=True)[:limit + 1]
+        page_ids = [project_id for _, project_id in keys[:limit]]
+        by_id = {project['_id']: project for project in self.projects.find({'_id': {'$in': page_ids}}, projection)}
+        projects = [by_id[project_id] for project_id in page_ids if project_id in by_id]
+
+        next_cursor = None
+        if len(keys) > limit:
+            next_cursor = encode_cursor(*keys[limit - 1])
+        return projects, next_cursor
@@ -0,0 +1,92 @@
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+# Upper bound on targets accepted by one batch follow request
+MAX_BATCH_FOLLOWS = 100
+
+class FollowService:
+    """Follow graph writes with counter maintenance in a single bulk_write"""
+
+    def __init__(self, users_collection, follows_collection):
+        self.users = users_collection
+        self.follows = follows_collection
+
+    def _existing_user_ids(self, user_ids):
+        """Return the subset of user_ids that exist, reading only _id"""
+        return {doc['_id'] for doc in self.users.find({'_id': {'$in': list(user_ids)}}, {'_id': 1})}
+
+    def toggle(self, follower_id, following_id):
+        """Follow or unfollow a user; returns the new state or None if either user is missing"""
+        follower_id, following_id = ObjectId(follower_id), ObjectId(following_id)
+
+        if self.users.count_documents({'_id': {'$in': [follower_id, following_id]}}) < 2:
+            return None
+
+        edge = {'followerId': follower_id, 'followingId': following_id}
+        try:
+            self.follows.insert_one({**edge, 'createdAt': datetime.utcnow()})
+            following, delta = True, 1
+        except DuplicateKeyError:
+            result = self.follows.delete_one(edge)
+            following, delta = False, -result.deleted_count
+
+        if delta:
+            touched = {'updatedAt': datetime.utcnow()}
+            self.users.bulk_write([
+                UpdateOne({'_id': follower_id}, {'$inc': {'following': delta}, '$set': touched}),
+                UpdateOne({'_id': following_id}, {'$inc': {'followers': delta}, '$set': touched})
+            ], ordered=False)
+        return following
+
+    def follow_many(self, follower_id, target_ids):
+        """Follow every existing target in a constant number of round trips
+
+        Returns a dict of ObjectId lists: followed, alreadyFollowing, notFound.
+        """
+        follower_id = ObjectId(follower_id)
+        targets = []
+        for target_id in target_ids:
+            target_id = ObjectId(target_id)
+            if target_id != follower_id and target_id not in targets:
+                targets.append(target_id)
+
+        existing = self._existing_user_ids(targets + [follower_id])
+        if follower_id not in existing:
+            return None
+
+        not_found = [target_id for target_id in targets if target_id not in existing]
+        candidates = [target_id for target_id in targets if target_id in existing]
+        if not candidates:
+            return {'followed': [], 'alreadyFollowing': [], 'notFound': not_found}
+
+        now = datetime.utcnow()
+        failed = set()
+        try:
+            self.follows.insert_many([
+                {'followerId': follower_id, 'followingId': target_id, 'createdAt': now}
+                for target_id in candidates
+            ], ordered=False)
+        except BulkWriteError as e:
+            # Duplicate key errors are edges that already exist
+            for error in e.details.get('writeErrors', []):
+                if error.get('code') != 11000:
+                    raise
+                failed.add(error['index'])
+
+        followed = [target_id for i, target_id in enumerate(candidates) if i not in failed]
+        already_following = [target_id for i, target_id in enumerate(candidates) if i in failed]
+
+        if followed:
+            operations = [UpdateOne(
+                {'_id': follower_id},
+                {'$inc': {'following': len(followed)}, '$set': {'updatedAt': now}}
+            )]
+            operations += [
+                UpdateOne({'_id': target_id}, {'$inc': {'followers': 1}, '$set': {'updatedAt': now}})
+                for target_id in followed
+            ]
+            self.users.bulk_write(operations, ordered=False)
+
+        return {'followed': followed, 'alreadyFollowing': already_following, 'notFound': not_found}
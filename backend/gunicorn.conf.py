@@ -0,0 +1,65 @@
+"""Production server settings
+
+    gunicorn -c gunicorn.conf.py -k uvicorn.workers.UvicornWorker asgi:application
+    gunicorn -c gunicorn.conf.py app:app   # WSGI only, threads hold SSE streams
+
+Worker and thread counts follow the core count unless WEB_CONCURRENCY /
+GUNICORN_THREADS are set. The app is preloaded once in the master and
+forked; MongoClient connects lazily, so each worker opens its own pool on
+first use. Indexes, including the unique ones the star and follow counters
+rely on, are created before any worker forks by running `python models.py`
+in a child process, so the master never connects the client the workers
+inherit; this is a no-op for indexes that already exist. Set
+CREATE_INDEXES_ON_START=false only when `python models.py` runs as a
+separate deploy step.
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+
+cores = multiprocessing.cpu_count()
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# Request handlers mostly wait on Mongo, so threads beat extra processes.
+# gthread applies to app:app; asgi:application runs on uvicorn workers
+# (-k uvicorn.workers.UvicornWorker), which hold /api/events streams on the
+# event loop and run the Flask routes on WSGI_THREADS threads.
+worker_class = os.environ.get('GUNICORN_WORKER_CLASS', 'gthread')
+workers = int(os.environ.get('WEB_CONCURRENCY', cores * 2 + 1))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+worker_connections = int(os.environ.get('GUNICORN_WORKER_CONNECTIONS', 1000))
+
+preload_app = True
+
+# Graceful drain: on HUP/TERM workers finish in-flight requests first
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 10000))
+max_requests_jitter = max_requests // 10
+
+accesslog = os.environ.get('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+
+def on_starting(server):
+    """Runs once in the master, before the app is loaded and workers fork"""
+    from config import Config
+    from events import check_broker
+    check_broker(Config.EVENT_BROKER_URL, workers)
+
+    if os.environ.get('CREATE_INDEXES_ON_START', 'true').lower() == 'true':
+        # A child process, so the preloaded app still forks with an unused client
+        subprocess.run([sys.executable, 'models.py'], cwd=os.path.dirname(os.path.abspath(__file__)), check=True)
+        server.log.info("Database indexes created")
+
+def worker_exit(server, worker):
+    """Finish queued image renders and feed fan-outs and write buffered view counts before a worker goes away"""
+    from app import upload_processor
+    from models import feed_service, view_counter
+    upload_processor.shutdown()
+    feed_service.shutdown()
+    view_counter.stop()
@@ -1,10 +1,27 @@
-from pymongo import MongoClient
 from datetime import datetime
 from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from cache import read_cache, user_key, project_key
+from config import Config
+from counts import count_cache
+from database import get_client, get_db
+from feed import FeedService
+from follows import FollowService
+from querystats import timed
+from utils import decode_cursor, encode_cursor, keyset_filter, make_etag
+from views import ViewCounter
+from related import RelatedIndex
+from tags import TagCounter
+from trending import MARK_TRENDING_DIRTY, TRENDING_DIRTY_FIELD, TRENDING_SCORE_FIELD, TrendingRanker
+from search import (
+    PREFIX_FIELD, USER_PREFIX_FIELDS, PROJECT_PREFIX_FIELDS,
+    build_search_prefixes, resolve_search, text_filter, text_score_projection, text_score_sort
+)
 
-# MongoDB connection
-client = MongoClient('mongodb://localhost:27017/')
-db = client['devconnect']
+# MongoDB connection, shared with app.py
+client = get_client()
+db = get_db()
 
 # Collections
 users_collection = db['users']
@@ -13,6 +30,68 @@ messages_collection = db['messages']
 conversations_collection = db['conversations']
 follows_collection = db['follows']
 stars_collection = db['stars']
+uploads_collection = db['uploads']
+timelines_collection = db['timelines']
+tag_counts_collection = db['tag_counts']
+suggestions_collection = db['suggestions']
+related_projects_collection = db['related_projects']
+blobs_collection = db['blobs']
+
+# Buffered project view counts, flushed in bulk; cached projects are
+# dropped on flush so their view totals catch up
+view_counter = ViewCounter(
+    projects_collection,
+    interval=Config.VIEW_FLUSH_INTERVAL,
+    on_flush=lambda project_ids: read_cache.delete(*map(project_key, project_ids)),
+    set_fields=MARK_TRENDING_DIRTY
+)
+
+# Follow graph writes
+follow_service = FollowService(users_collection, follows_collection)
+
+# MinHash index of similar projects with cached neighbors
+related_index = RelatedIndex(related_projects_collection, projects_collection, top_k=Config.RELATED_TOP_K)
+
+# Per-tag project counts
+tag_counter = TagCounter(tag_counts_collection, projects_collection)
+
+# Trending scores, rescored by `python trending.py`
+trending_ranker = TrendingRanker(projects_collection, half_life_hours=Config.TRENDING_HALF_LIFE_HOURS)
+
+# Per-user "following" timelines
+feed_service = FeedService(
+    users_collection, follows_collection, projects_collection, timelines_collection,
+    celebrity_followers=Config.FEED_CELEBRITY_FOLLOWERS,
+    cache=read_cache
+)
+
+# Projections
+USER_PUBLIC_PROJECTION = {'password': 0, PREFIX_FIELD: 0}
+USER_AUTH_PROJECTION = {PREFIX_FIELD: 0}
+AUTHOR_PROJECTION = {'fullName': 1, 'username': 1, 'avatar': 1, 'followers': 1}
+RELATED_PROJECTION = {'title': 1, 'description': 1, 'image': 1, 'tags': 1, 'author': 1, 'stars': 1, 'views': 1, 'createdAt': 1}
+SUGGESTION_PROJECTION = {'fullName': 1, 'username': 1, 'avatar': 1, 'bio': 1, 'skills': 1, 'followers': 1}
+PROJECT_PUBLIC_PROJECTION = {PREFIX_FIELD: 0, TRENDING_SCORE_FIELD: 0, TRENDING_DIRTY_FIELD: 0}
+
+# Fields that change whenever a public response would; view counts are left
+# out so a popular project can still be revalidated
+USER_VERSION_FIELDS = ('updatedAt', 'followers', 'following', 'projects')
+PROJECT_VERSION_FIELDS = ('updatedAt', 'stars')
+
+# User fields copied onto conversations for the inbox
+PARTICIPANT_SUMMARY_FIELDS = ('fullName', 'username', 'avatar')
+CONVERSATION_LIST_PROJECTION = {
+    'participants': 1,
+    'participantSummaries': 1,
+    'lastMessage': 1,
+    'lastMessageAt': 1,
+    'createdAt': 1
+}
+
+def document_version(doc, fields):
+    """Return (etag, last_modified) for a document's version fields"""
+    etag = make_etag(doc['_id'], *[doc.get(field) for field in fields])
+    return etag, doc.get('updatedAt')
 
 # Create indexes for better performance
 def create_indexes():
@@ -22,19 +101,23 @@ def create_indexes():
     users_collection.create_index([("email", 1)], unique=True)
     users_collection.create_index([("username", 1)], unique=True)
     users_collection.create_index([("fullName", "text"), ("username", "text"), ("skills", "text")])
+    users_collection.create_index([(PREFIX_FIELD, 1)])
     
     # Projects indexes
     projects_collection.create_index([("authorId", 1)])
     projects_collection.create_index([("tags", 1)])
     projects_collection.create_index([("createdAt", -1)])
+    projects_collection.create_index([("createdAt", -1), ("_id", -1)])
     projects_collection.create_index([("title", "text"), ("description", "text"), ("tags", "text")])
+    projects_collection.create_index([(PREFIX_FIELD, 1), ("createdAt", -1)])
     
     # Messages indexes
-    messages_collection.create_index([("conversationId", 1), ("createdAt", 1)])
+    messages_collection.create_index([("conversationId", 1), ("createdAt", 1), ("_id", 1)])
     messages_collection.create_index([("senderId", 1)])
     
     # Conversations indexes
     conversations_collection.create_index([("participants", 1)])
+    conversations_collection.create_index([("participants", 1), ("lastMessageAt", -1)])
     conversations_collection.create_index([("lastMessageAt", -1)])
     
     # Follows indexes
@@ -45,33 +128,136 @@ def create_indexes():
     # Stars indexes
     stars_collection.create_index([("userId", 1), ("projectId", 1)], unique=True)
     stars_collection.create_index([("projectId", 1)])
+    
+    # Uploads indexes
+    uploads_collection.create_index([("ownerId", 1), ("createdAt", -1)])
+    uploads_collection.create_index([("filename", 1), ("status", 1)])
+    
+    # Related projects indexes
+    related_index.create_indexes()
+    
+    # Tag counts indexes
+    tag_counter.create_indexes()
+    
+    # Trending indexes
+    trending_ranker.create_indexes()
+    
+    # Timelines indexes
+    feed_service.create_indexes()
 
 # User model functions
 class UserModel:
     @staticmethod
+    @timed
     def create_user(user_data):
         """Create a new user"""
         user_data['createdAt'] = datetime.utcnow()
         user_data['updatedAt'] = datetime.utcnow()
+        user_data[PREFIX_FIELD] = build_search_prefixes(user_data, USER_PREFIX_FIELDS)
         result = users_collection.insert_one(user_data)
+        count_cache.invalidate(users_collection.name)
         return str(result.inserted_id)
     
     @staticmethod
-    def get_user_by_id(user_id):
+    @timed
+    def get_user_by_id(user_id, projection=USER_PUBLIC_PROJECTION):
         """Get user by ID"""
-        return users_collection.find_one({'_id': ObjectId(user_id)})
+        return users_collection.find_one({'_id': ObjectId(user_id)}, projection)
     
     @staticmethod
-    def get_user_by_email(email):
-        """Get user by email"""
-        return users_collection.find_one({'email': email})
+    @timed
+    def get_suggestions(user_id, limit=10):
+        """Get precomputed "who to follow" suggestions with user summaries
+
+        People followed since the last recommender run are skipped.
+        """
+        doc = suggestions_collection.find_one({'_id': ObjectId(user_id)})
+        if not doc:
+            return []
+        
+        entries = doc['suggestions']
+        ids = [entry['userId'] for entry in entries]
+        followed = {follow['followingId'] for follow in follows_collection.find(
+            {'followerId': ObjectId(user_id), 'followingId': {'$in': ids}}, {'followingId': 1}
+        )}
+        users = {user['_id']: user for user in users_collection.find(
+            {'_id': {'$in': ids}, 'isActive': {'$ne': False}}, SUGGESTION_PROJECTION
+        )}
+        suggestions = [
+            {**users[entry['userId']], 'mutual': entry['mutual']}
+            for entry in entries if entry['userId'] in users and entry['userId'] not in followed
+        ]
+        return suggestions[:limit]
     
     @staticmethod
-    def get_user_by_username(username):
-        """Get user by username"""
-        return users_collection.find_one({'username': username})
+    @timed
+    def get_user_by_email(email, projection=USER_AUTH_PROJECTION):
+        """Get user by email, including the password hash"""
+        return users_collection.find_one({'email': email}, projection)
     
     @staticmethod
+    @timed
+    def get_user_by_username(username, projection=USER_PUBLIC_PROJECTION):
+        """Get user by username; public profiles are served from the read cache"""
+        if projection is not USER_PUBLIC_PROJECTION:
+            return users_collection.find_one({'username': username}, projection)
+        return read_cache.get_or_load(
+            user_key(username),
+            lambda: users_collection.find_one({'username': username}, projection)
+        )
+    
+    @staticmethod
+    @timed
+    def get_user_version(username):
+        """Get only the fields that version a public profile"""
+        return users_collection.find_one(
+            {'username': username},
+            {field: 1 for field in USER_VERSION_FIELDS}
+        )
+    
+    @staticmethod
+    @timed
+    def invalidate_profiles(user_ids):
+        """Drop cached profiles after their counters changed elsewhere"""
+        users = users_collection.find({'_id': {'$in': [ObjectId(u) for u in user_ids]}}, {'username': 1})
+        read_cache.delete(*[user_key(user['username']) for user in users])
+    
+    @staticmethod
+    @timed
+    def exists_with_email_or_username(email, username):
+        """Check whether the email or username is taken"""
+        return users_collection.find_one(
+            {'$or': [{'email': email}, {'username': username}]},
+            {'_id': 1}
+        ) is not None
+    
+    @staticmethod
+    @timed
+    def search_users(search='', mode='auto', skip=0, limit=10):
+        """Get a page of users, ranked by relevance for full-text matches
+
+        Returns (users, total, approximate, search_mode).
+        """
+        query = {}
+        search_mode = None
+        if search:
+            search_mode, query, total, approximate = resolve_search(
+                users_collection, search, mode, count=count_cache.count
+            )
+        else:
+            total, approximate = count_cache.count(users_collection, query)
+        
+        if search_mode == 'text':
+            cursor = users_collection.find(
+                query, {**USER_PUBLIC_PROJECTION, **text_score_projection()}
+            ).sort(text_score_sort())
+        else:
+            cursor = users_collection.find(query, USER_PUBLIC_PROJECTION)
+        users = list(cursor.skip(skip).limit(limit))
+        return users, total, approximate, search_mode
+    
+    @staticmethod
+    @timed
     def update_user(user_id, update_data):
         """Update user data"""
         update_data['updatedAt'] = datetime.utcnow()
@@ -79,87 +265,460 @@ class UserModel:
             {'_id': ObjectId(user_id)},
             {'$set': update_data}
         )
+    
+    @staticmethod
+    @timed
+    def update_profile(user_id, update_data):
+        """Update profile fields and everything derived from them
+
+        Returns the updated public profile, or None if the user does not exist.
+        """
+        # Keep the type-ahead prefixes in step with the searchable fields
+        if any(field in update_data for field in USER_PREFIX_FIELDS):
+            current = users_collection.find_one(
+                {'_id': ObjectId(user_id)},
+                {field: 1 for field in USER_PREFIX_FIELDS}
+            )
+            if current:
+                update_data[PREFIX_FIELD] = build_search_prefixes(
+                    {**current, **update_data}, USER_PREFIX_FIELDS
+                )
+        
+        update_data['updatedAt'] = datetime.utcnow()
+        user = users_collection.find_one_and_update(
+            {'_id': ObjectId(user_id)},
+            {'$set': update_data},
+            projection=USER_PUBLIC_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
+        if not user:
+            return None
+        
+        read_cache.delete(user_key(user['username']))
+        if PREFIX_FIELD in update_data:
+            count_cache.invalidate(users_collection.name)
+        
+        ConversationModel.refresh_participant_summaries(user_id, update_data)
+        return user
+    
+    @staticmethod
+    @timed
+    def increment_counter(user_id, field, amount=1):
+        """Adjust one of the user's denormalized counters"""
+        user = users_collection.find_one_and_update(
+            {'_id': ObjectId(user_id)},
+            {'$inc': {field: amount}, '$set': {'updatedAt': datetime.utcnow()}},
+            projection={'username': 1}
+        )
+        if user:
+            read_cache.delete(user_key(user['username']))
+        return user
 
 # Project model functions
 class ProjectModel:
     @staticmethod
+    @timed
     def create_project(project_data):
         """Create a new project"""
-        project_data['createdAt'] = datetime.utcnow()
-        project_data['updatedAt'] = datetime.utcnow()
+        project_data.setdefault('createdAt', datetime.utcnow())
+        project_data.setdefault('updatedAt', project_data['createdAt'])
+        project_data[PREFIX_FIELD] = build_search_prefixes(project_data, PROJECT_PREFIX_FIELDS)
+        project_data[TRENDING_SCORE_FIELD] = trending_ranker.score(project_data)
         result = projects_collection.insert_one(project_data)
+        del project_data[PREFIX_FIELD], project_data[TRENDING_SCORE_FIELD]
+        tag_counter.apply(added=project_data.get('tags', []))
+        related_index.add(project_data)
+        count_cache.invalidate(projects_collection.name)
         return str(result.inserted_id)
     
     @staticmethod
-    def get_project_by_id(project_id):
+    @timed
+    def get_project_by_id(project_id, projection=PROJECT_PUBLIC_PROJECTION):
         """Get project by ID"""
-        return projects_collection.find_one({'_id': ObjectId(project_id)})
+        return projects_collection.find_one({'_id': ObjectId(project_id)}, projection)
+    
+    @staticmethod
+    @timed
+    def get_project_version(project_id):
+        """Get only the fields that version a project"""
+        return projects_collection.find_one(
+            {'_id': ObjectId(project_id)},
+            {field: 1 for field in PROJECT_VERSION_FIELDS}
+        )
+    
+    @staticmethod
+    @timed
+    def record_view(project_id):
+        """Count one view without reading the project"""
+        if Config.VIEW_COUNTER_BUFFERED:
+            view_counter.record(project_id)
+        else:
+            projects_collection.update_one(
+                {'_id': ObjectId(project_id)},
+                {'$inc': {'views': 1}, '$set': MARK_TRENDING_DIRTY}
+            )
+    
+    @staticmethod
+    @timed
+    def get_project_and_record_view(project_id):
+        """Get a project and count one view against it
+
+        With buffered views the project body comes from the read cache.
+        """
+        if Config.VIEW_COUNTER_BUFFERED:
+            project = read_cache.get_or_load(
+                project_key(project_id),
+                lambda: projects_collection.find_one({'_id': ObjectId(project_id)}, PROJECT_PUBLIC_PROJECTION)
+            )
+            if project:
+                # Include views that have not been flushed yet
+                project['views'] += view_counter.record(project_id)
+            return project
+        
+        # Read and increment in one round trip
+        return projects_collection.find_one_and_update(
+            {'_id': ObjectId(project_id)},
+            {'$inc': {'views': 1}, '$set': MARK_TRENDING_DIRTY},
+            projection=PROJECT_PUBLIC_PROJECTION,
+            return_document=ReturnDocument.AFTER
+        )
     
     @staticmethod
+    @timed
+    def list_projects(tag='', author='', search='', mode='auto', cursor='', skip=0, limit=12):
+        """Get a page of the project feed
+
+        Returns (projects, total, approximate, search_mode, next_cursor).
+        Raises ValueError for an unknown search mode or a malformed cursor.
+        """
+        query = project_list_query(tag, author)
+        
+        search_mode = None
+        if search:
+            search_mode, query, total, approximate = resolve_search(
+                projects_collection, search, mode, query, count=count_cache.count
+            )
+        else:
+            total, approximate = count_cache.count(projects_collection, query)
+        
+        pipeline = project_list_pipeline(query, search_mode, cursor, skip, limit)
+        projects, next_cursor = page_with_cursor(
+            list(projects_collection.aggregate(pipeline)), limit, search_mode
+        )
+        return projects, total, approximate, search_mode, next_cursor
+    
+    @staticmethod
+    @timed
+    def get_related(project_id, limit=10):
+        """Get a project's precomputed neighbors, most similar first"""
+        entries = related_index.related(ObjectId(project_id))[:limit]
+        projects = {project['_id']: project for project in projects_collection.find(
+            {'_id': {'$in': [entry['projectId'] for entry in entries]}}, RELATED_PROJECTION
+        )}
+        return [
+            {**projects[entry['projectId']], 'similarity': entry['score']}
+            for entry in entries if entry['projectId'] in projects
+        ]
+    
+    @staticmethod
+    @timed
+    def get_tag_counts(limit=50):
+        """Get the most used tags with their project counts, plus the project total"""
+        total, _ = count_cache.count(projects_collection, {})
+        return tag_counter.top(limit), total
+    
+    @staticmethod
+    @timed
+    def get_trending(limit=10):
+        """Get the top projects by precomputed trending score"""
+        return trending_ranker.top(limit, PROJECT_PUBLIC_PROJECTION)
+    
+    @staticmethod
+    @timed
     def get_projects_by_author(author_id, page=1, limit=10):
-        """Get projects by author"""
+        """Get projects by author; the total may be served from the count cache"""
         skip = (page - 1) * limit
-        projects = list(projects_collection.find({'authorId': ObjectId(author_id)})
+        projects = list(projects_collection.find({'authorId': ObjectId(author_id)}, PROJECT_PUBLIC_PROJECTION)
                        .sort('createdAt', -1)
                        .skip(skip)
                        .limit(limit))
-        total = projects_collection.count_documents({'authorId': ObjectId(author_id)})
+        total, _ = count_cache.count(projects_collection, {'authorId': ObjectId(author_id)})
         return projects, total
     
     @staticmethod
+    @timed
     def search_projects(query, page=1, limit=12):
-        """Search projects"""
+        """Search projects, ranked by text relevance"""
         skip = (page - 1) * limit
-        search_filter = {}
         
         if query:
-            search_filter['$text'] = {'$search': query}
+            search_filter = text_filter(query)
+            cursor = (projects_collection.find(search_filter, {**PROJECT_PUBLIC_PROJECTION, **text_score_projection()})
+                      .sort(text_score_sort()))
+        else:
+            search_filter = {}
+            cursor = projects_collection.find(search_filter, PROJECT_PUBLIC_PROJECTION).sort('createdAt', -1)
         
-        projects = list(projects_collection.find(search_filter)
-                       .sort('createdAt', -1)
-                       .skip(skip)
-                       .limit(limit))
-        total = projects_collection.count_documents(search_filter)
+        projects = list(cursor.skip(skip).limit(limit))
+        total, _ = count_cache.count(projects_collection, search_filter)
         return projects, total
 
+def project_list_query(tag, author):
+    """Filter for the project feed's tag and author parameters"""
+    query = {}
+    if tag and tag != 'All':
+        query['tags'] = {'$in': [tag]}
+    
+    if author:
+        query['author.username'] = author
+    return query
+
+def project_list_pipeline(query, search_mode, cursor, skip, limit):
+    """Aggregation for one page of the project feed
+
+    Relevance-ranked results page by offset; everything else seeks past the
+    cursor on (createdAt, _id). One extra row is fetched to detect a next page.
+    """
+    if search_mode == 'text':
+        sort_stage = {'score': {'$meta': 'textScore'}, '_id': -1}
+    else:
+        sort_stage = {'createdAt': -1, '_id': -1}
+    
+    match = query
+    if cursor and search_mode != 'text':
+        cursor_created_at, cursor_id = decode_cursor(cursor)
+        seek = keyset_filter(cursor_created_at, cursor_id)
+        match = {'$and': [query, seek]} if query else seek
+        skip = 0
+    
+    # Page first, then join author info onto the returned rows only
+    return [
+        {'$match': match},
+        {'$sort': sort_stage},
+        {'$skip': skip},
+        {'$limit': limit + 1},
+        {'$lookup': {
+            'from': 'users',
+            'localField': 'authorId',
+            'foreignField': '_id',
+            'as': 'authorInfo'
+        }},
+        # Keep rows whose author is gone, falling back to the embedded copy
+        {'$unwind': {'path': '$authorInfo', 'preserveNullAndEmptyArrays': True}},
+        {'$addFields': {
+            'author.name': {'$ifNull': ['$authorInfo.fullName', '$author.name']},
+            'author.username': {'$ifNull': ['$authorInfo.username', '$author.username']},
+            'author.avatar': {'$ifNull': ['$authorInfo.avatar', '$author.avatar']}
+        }},
+        {'$project': {'authorInfo': 0, **PROJECT_PUBLIC_PROJECTION}}
+    ]
+
+def page_with_cursor(projects, limit, search_mode):
+    """Trim the look-ahead row and return (projects, next_cursor)"""
+    next_cursor = None
+    if len(projects) > limit:
+        projects = projects[:limit]
+        last = projects[-1]
+        if search_mode != 'text':
+            next_cursor = encode_cursor(last['createdAt'], last['_id'])
+    return projects, next_cursor
+
+# Star model functions
+class StarModel:
+    @staticmethod
+    @timed
+    def toggle_star(user_id, project_id):
+        """Star or unstar a project
+
+        Returns (starred, stars), or None if the project does not exist.
+        """
+        star_key = {
+            'userId': ObjectId(user_id),
+            'projectId': ObjectId(project_id)
+        }
+        
+        # The unique (userId, projectId) index decides the toggle direction
+        try:
+            stars_collection.insert_one({**star_key, 'createdAt': datetime.utcnow()})
+            starred = True
+            delta = 1
+        except DuplicateKeyError:
+            result = stars_collection.delete_one(star_key)
+            starred = False
+            # A concurrent request may already have removed it
+            delta = -result.deleted_count
+        
+        # Apply the counter change and read the new total in one round trip
+        project = projects_collection.find_one_and_update(
+            {'_id': ObjectId(project_id)},
+            {'$inc': {'stars': delta}, '$set': {'updatedAt': datetime.utcnow(), **MARK_TRENDING_DIRTY}},
+            projection={'stars': 1},
+            return_document=ReturnDocument.AFTER
+        )
+        
+        if not project:
+            if starred:
+                stars_collection.delete_one(star_key)
+            return None
+        
+        read_cache.delete(project_key(project_id))
+        return starred, project['stars']
+
 # Message model functions
 class MessageModel:
     @staticmethod
+    @timed
     def create_message(message_data):
         """Create a new message"""
-        message_data['createdAt'] = datetime.utcnow()
+        message_data.setdefault('createdAt', datetime.utcnow())
         result = messages_collection.insert_one(message_data)
         return str(result.inserted_id)
     
     @staticmethod
-    def get_conversation_messages(conversation_id):
-        """Get messages for a conversation"""
-        return list(messages_collection.find({'conversationId': ObjectId(conversation_id)})
-                   .sort('createdAt', 1))
+    @timed
+    def get_conversation_messages(conversation_id, before=None, after=None, limit=50):
+        """Get a page of messages for a conversation, oldest first
+
+        Without cursors this is the newest page; before/after are message ids.
+        Returns (messages, has_more), or None if the cursor message is not in
+        the conversation.
+        """
+        query = {'conversationId': ObjectId(conversation_id)}
+        anchor_id = before or after
+        if anchor_id:
+            anchor = messages_collection.find_one(
+                {'_id': ObjectId(anchor_id), 'conversationId': ObjectId(conversation_id)},
+                {'createdAt': 1}
+            )
+            if not anchor:
+                return None
+            query.update(keyset_filter(anchor['createdAt'], anchor['_id'], older=bool(before)))
+        
+        # Newer-than pages read forward; everything else reads back from the newest
+        direction = 1 if after else -1
+        messages = list(messages_collection.find(query)
+                        .sort([('createdAt', direction), ('_id', direction)])
+                        .limit(limit + 1))
+        
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        if direction == -1:
+            messages.reverse()
+        return messages, has_more
 
 # Conversation model functions
 class ConversationModel:
     @staticmethod
+    @timed
     def create_conversation(participants):
-        """Create a new conversation"""
+        """Create a new conversation with denormalized participant summaries
+
+        Returns the conversation, or None if a participant does not exist.
+        """
+        participants = [ObjectId(p) for p in participants]
+        summaries = ConversationModel.participant_summaries(participants)
+        if len(summaries) < len(participants):
+            return None
+        
         conversation_data = {
-            'participants': [ObjectId(p) for p in participants],
+            'participants': participants,
+            'participantSummaries': [summaries[p] for p in participants],
             'createdAt': datetime.utcnow(),
             'lastMessageAt': datetime.utcnow(),
             'lastMessage': ''
         }
         result = conversations_collection.insert_one(conversation_data)
-        return str(result.inserted_id)
+        conversation_data['_id'] = result.inserted_id
+        return conversation_data
+    
+    @staticmethod
+    @timed
+    def find_between(user_id, other_user_id):
+        """Get the conversation between two users, if any"""
+        return conversations_collection.find_one({
+            'participants': {'$all': [ObjectId(user_id), ObjectId(other_user_id)]}
+        })
+    
+    @staticmethod
+    @timed
+    def get_for_participant(conversation_id, user_id, projection=None):
+        """Get a conversation only if the user takes part in it"""
+        return conversations_collection.find_one({
+            '_id': ObjectId(conversation_id),
+            'participants': ObjectId(user_id)
+        }, projection or {'_id': 1})
     
     @staticmethod
+    @timed
     def get_user_conversations(user_id):
-        """Get conversations for a user"""
-        return list(conversations_collection.find({'participants': ObjectId(user_id)})
-                   .sort('lastMessageAt', -1))
+        """Get a user's inbox, newest first, with the other participant's summary"""
+        user_oid = ObjectId(user_id)
+        
+        # Single indexed find; participant names are stored on the conversation
+        conversations = list(conversations_collection.find(
+            {'participants': user_oid},
+            CONVERSATION_LIST_PROJECTION
+        ).sort('lastMessageAt', -1))
+        
+        # Conversations created before summaries existed get one batched lookup
+        missing = [c for c in conversations if 'participantSummaries' not in c]
+        if missing:
+            summaries = ConversationModel.participant_summaries(
+                {p for c in missing for p in c['participants']}
+            )
+            for conversation in missing:
+                conversation['participantSummaries'] = [
+                    summaries[p] for p in conversation['participants'] if p in summaries
+                ]
+        
+        for conversation in conversations:
+            conversation['otherParticipant'] = next(
+                (p for p in conversation.pop('participantSummaries') if p['_id'] != user_oid),
+                None
+            )
+        return conversations
+    
+    @staticmethod
+    @timed
+    def record_message(conversation_id, content, sent_at):
+        """Update the conversation's last message preview"""
+        return conversations_collection.update_one(
+            {'_id': ObjectId(conversation_id)},
+            {'$set': {'lastMessage': content, 'lastMessageAt': sent_at}}
+        )
+    
+    @staticmethod
+    def participant_summaries(user_ids):
+        """Map user ids to the name/username/avatar stored on conversations"""
+        users = users_collection.find(
+            {'_id': {'$in': list(user_ids)}},
+            {field: 1 for field in PARTICIPANT_SUMMARY_FIELDS}
+        )
+        return {
+            user['_id']: {'_id': user['_id'], **{f: user.get(f, '') for f in PARTICIPANT_SUMMARY_FIELDS}}
+            for user in users
+        }
+    
+    @staticmethod
+    @timed
+    def refresh_participant_summaries(user_id, update_data):
+        """Fan profile changes out to the summaries stored on conversations"""
+        summary_update = {
+            f'participantSummaries.$[p].{field}': update_data[field]
+            for field in PARTICIPANT_SUMMARY_FIELDS if field in update_data
+        }
+        if not summary_update:
+            return None
+        return conversations_collection.update_many(
+            {'participants': ObjectId(user_id)},
+            {'$set': summary_update},
+            array_filters=[{'p._id': ObjectId(user_id)}]
+        )
 
 # Follow model functions
 class FollowModel:
     @staticmethod
+    @timed
     def follow_user(follower_id, following_id):
         """Follow a user"""
         follow_data = {
@@ -170,6 +729,7 @@ class FollowModel:
         return follows_collection.insert_one(follow_data)
     
     @staticmethod
+    @timed
     def unfollow_user(follower_id, following_id):
         """Unfollow a user"""
         return follows_collection.delete_one({
@@ -178,14 +738,137 @@ class FollowModel:
         })
     
     @staticmethod
+    @timed
     def is_following(follower_id, following_id):
         """Check if user is following another user"""
         return follows_collection.find_one({
             'followerId': ObjectId(follower_id),
             'followingId': ObjectId(following_id)
-        }) is not None
+        }, {'_id': 1}) is not None
+    
+    @staticmethod
+    @timed
+    def toggle_follow(follower_id, following_id):
+        """Follow or unfollow; returns the new state or None if either user is missing"""
+        following = follow_service.toggle(follower_id, following_id)
+        if following is not None:
+            UserModel.invalidate_profiles([follower_id, following_id])
+        if following:
+            feed_service.backfill(follower_id, [following_id])
+        elif following is False:
+            feed_service.remove_author(follower_id, following_id)
+        return following
+    
+    @staticmethod
+    @timed
+    def follow_many(follower_id, target_ids):
+        """Follow several users in a constant number of round trips"""
+        result = follow_service.follow_many(follower_id, target_ids)
+        if result and result['followed']:
+            UserModel.invalidate_profiles([follower_id, *result['followed']])
+            feed_service.backfill(follower_id, result['followed'])
+        return result
+
+# Feed model functions
+class FeedModel:
+    @staticmethod
+    @timed
+    def fan_out_project(project, follower_count):
+        """Queue pushing a new project into its author's followers' timelines"""
+        return feed_service.submit_fan_out(project, follower_count)
+    
+    @staticmethod
+    @timed
+    def get_feed(user_id, cursor='', limit=12):
+        """Get a page of projects by followed authors; returns (projects, next_cursor)"""
+        return feed_service.page(user_id, cursor, limit, PROJECT_PUBLIC_PROJECTION)
+
+# Upload model functions; each stored file (<sha256>.<ext>) has one blobs
+# document holding its reference count and rendered variants
+class UploadModel:
+    @staticmethod
+    @timed
+    def acquire_blob(filename, status):
+        """Add a reference to a stored file, creating its blob on first use
+
+        Returns (blob, created).
+        """
+        blob = blobs_collection.find_one_and_update(
+            {'_id': filename},
+            {
+                '$inc': {'refs': 1},
+                '$setOnInsert': {'status': status, 'variants': {}, 'createdAt': datetime.utcnow()}
+            },
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return blob, blob['refs'] == 1
+    
+    @staticmethod
+    @timed
+    def blob_exists(filename):
+        """Whether any upload references a stored file"""
+        return blobs_collection.find_one({'_id': filename}, {'_id': 1}) is not None
+    
+    @staticmethod
+    @timed
+    def release_blob(filename):
+        """Drop a reference; returns the blob when it was the last one"""
+        blobs_collection.update_one({'_id': filename}, {'$inc': {'refs': -1}})
+        return blobs_collection.find_one_and_delete({'_id': filename, 'refs': {'$lte': 0}})
+    
+    @staticmethod
+    @timed
+    def create_upload(upload_data):
+        """Record a stored upload"""
+        upload_data.setdefault('createdAt', datetime.utcnow())
+        result = uploads_collection.insert_one(upload_data)
+        return str(result.inserted_id)
+    
+    @staticmethod
+    @timed
+    def get_upload(upload_id, owner_id):
+        """Get an upload owned by the user"""
+        return uploads_collection.find_one({'_id': ObjectId(upload_id), 'ownerId': ObjectId(owner_id)})
+    
+    @staticmethod
+    @timed
+    def delete_upload(upload_id, owner_id):
+        """Delete an upload owned by the user and return it"""
+        return uploads_collection.find_one_and_delete({'_id': ObjectId(upload_id), 'ownerId': ObjectId(owner_id)})
+    
+    @staticmethod
+    @timed
+    def copy_blob_result(upload_id, blob):
+        """Give an upload the status and variants already rendered for its blob"""
+        update = {'status': blob['status'], 'variants': blob['variants']}
+        if 'error' in blob:
+            update['error'] = blob['error']
+        uploads_collection.update_one({'_id': ObjectId(upload_id)}, {'$set': update})
+        return update
+    
+    @staticmethod
+    @timed
+    def finish_processing(filename, variants, error=None):
+        """Store a blob's rendered variants, or the failure, on it and every
+        upload still waiting for it; returns those uploads
+        """
+        if error is None:
+            update = {'status': 'ready', 'variants': variants}
+        else:
+            update = {'status': 'failed', 'error': str(error)}
+        update['updatedAt'] = datetime.utcnow()
+        blobs_collection.update_one({'_id': filename}, {'$set': update})
+        
+        waiting = {'filename': filename, 'status': 'processing'}
+        uploads = list(uploads_collection.find(waiting, {'_id': 1}))
+        if uploads:
+            ids = [upload['_id'] for upload in uploads]
+            uploads_collection.update_many({'_id': {'$in': ids}}, {'$set': update})
+            uploads = list(uploads_collection.find({'_id': {'$in': ids}}))
+        return uploads
 
 # Initialize database indexes
 if __name__ == '__main__':
     create_indexes()
-    print("Database indexes created successfully!")
\ No newline at end of file
+    print("Database indexes created successfully!")
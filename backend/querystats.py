@@ -0,0 +1,98 @@
+import contextvars
+import random
+import threading
+import time
+from functools import wraps
+import bson
+from config import Config
+
+# Per-request totals; None outside a request
+_request_totals = contextvars.ContextVar('request_totals', default=None)
+
+# Nesting depth, so a model method calling another is only counted once per request
+_depth = contextvars.ContextVar('query_depth', default=0)
+
+class QueryStats:
+    """Call count, latency and sampled result size per data-access method
+
+    Only a `sample_rate` fraction of calls have their results BSON-encoded to
+    measure them, since encoding costs about as much as decoding the reply.
+    """
+
+    def __init__(self, sample_rate=0.01):
+        self._lock = threading.Lock()
+        self._methods = {}
+        self.sample_rate = sample_rate
+
+    def sample(self):
+        """Whether to measure the result of the call being recorded"""
+        return self.sample_rate >= 1 or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def record(self, name, elapsed_ms, size=None):
+        with self._lock:
+            stats = self._methods.setdefault(name, {'calls': 0, 'totalMs': 0.0, 'maxMs': 0.0, 'sampled': 0, 'bytes': 0})
+            stats['calls'] += 1
+            stats['totalMs'] += elapsed_ms
+            stats['maxMs'] = max(stats['maxMs'], elapsed_ms)
+            if size is not None:
+                stats['sampled'] += 1
+                stats['bytes'] += size
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                name: {
+                    **stats,
+                    'avgMs': stats['totalMs'] / stats['calls'],
+                    'avgBytes': stats['bytes'] / stats['sampled'] if stats['sampled'] else None
+                }
+                for name, stats in self._methods.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._methods.clear()
+
+query_stats = QueryStats(Config.QUERY_STATS_SAMPLE_RATE)
+
+def result_size(result):
+    """Approximate BSON bytes of the documents a model method returned"""
+    try:
+        if isinstance(result, dict):
+            return len(bson.encode(result))
+        if isinstance(result, (list, tuple)):
+            return sum(result_size(item) for item in result)
+    except Exception:
+        pass
+    return 0
+
+def timed(func):
+    """Record latency, and for sampled calls result size, for a data-access method"""
+    name = func.__qualname__
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _depth.set(_depth.get() + 1)
+        started = time.perf_counter()
+        try:
+            result = func(*args, **kwargs)
+        finally:
+            _depth.reset(token)
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        size = result_size(result) if query_stats.sample() else None
+        query_stats.record(name, elapsed_ms, size)
+
+        totals = _request_totals.get()
+        if totals is not None and _depth.get() == 0:
+            totals['queries'] += 1
+            totals['ms'] += elapsed_ms
+        return result
+    return wrapper
+
+def begin_request():
+    """Start collecting totals for the current request"""
+    _request_totals.set({'queries': 0, 'ms': 0.0})
+
+def request_totals():
+    """Totals collected since begin_request(), or None"""
+    return _request_totals.get()
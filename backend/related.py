@@ -0,0 +1,143 @@
+"""Related projects from a MinHash index over title, description and tags
+
+Each project's words and tags are reduced to a MinHash signature; the share
+of matching signature slots estimates the Jaccard similarity of two
+projects. Signatures are split into bands, and projects sharing any band
+key are candidates, found through a multikey index on the index collection.
+The top-K neighbors of every project are stored next to its signature, so a
+lookup is one read by _id and never touches projects_collection.
+
+    python related.py --rebuild   # index every project, e.g. the first time
+"""
+import hashlib
+import random
+import re
+import sys
+from pymongo import UpdateOne
+
+NUM_PERMUTATIONS = 64
+# 32 bands of 2 slots: projects with Jaccard similarity around 0.2 and up
+# usually share a band
+BANDS = 32
+ROWS_PER_BAND = NUM_PERMUTATIONS // BANDS
+
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(20240611)  # fixed so every process hashes alike
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERMUTATIONS)
+]
+
+STOP_WORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'has', 'in', 'is', 'it', 'its',
+    'of', 'on', 'or', 'that', 'the', 'this', 'to', 'was', 'with', 'you', 'your', 'we', 'our', 'app'
+}
+WORD = re.compile(r'[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]')
+
+# Fields the index is built from
+INDEXED_FIELDS = {'title': 1, 'description': 1, 'tags': 1}
+
+def project_tokens(project):
+    """Distinct words of the title and description plus tags"""
+    text = f"{project.get('title', '')} {project.get('description', '')}".lower()
+    tokens = {word for word in WORD.findall(text) if word not in STOP_WORDS}
+    tokens.update('tag:' + str(tag).lower() for tag in project.get('tags') or [])
+    return tokens
+
+def _hash64(value):
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), 'big')
+
+def minhash(tokens):
+    """MinHash signature of a token set"""
+    if not tokens:
+        return [MERSENNE_PRIME] * NUM_PERMUTATIONS
+    hashes = [_hash64(token) % MERSENNE_PRIME for token in tokens]
+    return [min((a * h + b) % MERSENNE_PRIME for h in hashes) for a, b in PERMUTATIONS]
+
+def band_keys(signature):
+    """One int64 key per band, for the multikey index"""
+    keys = []
+    for band in range(BANDS):
+        values = signature[band * ROWS_PER_BAND:(band + 1) * ROWS_PER_BAND]
+        digest = hashlib.blake2b(f'{band}:{values}'.encode(), digest_size=8).digest()
+        keys.append(int.from_bytes(digest, 'big', signed=True))
+    return keys
+
+def similarity(a, b):
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(x == y for x, y in zip(a, b)) / NUM_PERMUTATIONS
+
+class RelatedIndex:
+    """MinHash LSH index with cached top-K neighbors per project
+
+    Documents are {_id: projectId, signature, bands, related: [{projectId,
+    score}]}, with related kept sorted and capped at top_k.
+    """
+
+    def __init__(self, index_collection, projects_collection, top_k=10, max_candidates=500, min_score=0.1):
+        self.index = index_collection
+        self.projects = projects_collection
+        self.top_k = top_k
+        self.max_candidates = max_candidates
+        self.min_score = min_score
+
+    def create_indexes(self):
+        self.index.create_index([("bands", 1)])
+
+    def add(self, project):
+        """Index a new project, caching its neighbors and offering it to theirs
+
+        Takes the project document (at least _id and INDEXED_FIELDS); returns
+        its related list.
+        """
+        signature = minhash(project_tokens(project))
+        bands = band_keys(signature)
+
+        # Newest candidates first, so a crowded bucket favors recent projects
+        candidates = (self.index.find({'bands': {'$in': bands}}, {'signature': 1})
+                      .sort('_id', -1)
+                      .limit(self.max_candidates))
+        scored = [
+            {'projectId': candidate['_id'], 'score': similarity(signature, candidate['signature'])}
+            for candidate in candidates if candidate['_id'] != project['_id']
+        ]
+        scored = sorted((entry for entry in scored if entry['score'] >= self.min_score),
+                        key=lambda entry: entry['score'], reverse=True)
+        related = scored[:self.top_k]
+
+        operations = [UpdateOne(
+            {'_id': project['_id']},
+            {'$set': {'signature': signature, 'bands': bands, 'related': related}},
+            upsert=True
+        )]
+        # $push with $sort/$slice keeps each neighbor's list sorted and capped
+        operations += [UpdateOne(
+            {'_id': entry['projectId']},
+            {'$push': {'related': {
+                '$each': [{'projectId': project['_id'], 'score': entry['score']}],
+                '$sort': {'score': -1},
+                '$slice': self.top_k
+            }}}
+        ) for entry in scored]
+        self.index.bulk_write(operations, ordered=False)
+        return related
+
+    def related(self, project_id):
+        """Cached neighbors of a project as [{'projectId', 'score'}]"""
+        doc = self.index.find_one({'_id': project_id}, {'related': 1})
+        return doc['related'] if doc else []
+
+    def rebuild(self):
+        """Re-index every project from scratch, oldest first; returns the count"""
+        self.index.delete_many({})
+        count = 0
+        for project in self.projects.find({}, INDEXED_FIELDS).sort('_id', 1):
+            self.add(project)
+            count += 1
+        return count
+
+if __name__ == '__main__':
+    from models import related_index
+
+    if '--rebuild' in sys.argv:
+        print(f"Indexed {related_index.rebuild()} projects")
@@ -9,9 +9,9 @@ if __name__ == '__main__':
     # Get port from environment variable or default to 5000
     port = int(os.environ.get('PORT', 5000))
     
-    # Run the application
+    # Development server only; production uses gunicorn -c gunicorn.conf.py app:app
     app.run(
-        debug=True,
+        debug=os.environ.get('FLASK_ENV', 'development') == 'development',
         host='0.0.0.0',
         port=port
     )
\ No newline at end of file
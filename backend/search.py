@@ -0,0 +1,117 @@
+import asyncio
+import re
+from pymongo import UpdateOne
+
+# Prefix index settings
+PREFIX_FIELD = 'searchPrefixes'
+MAX_PREFIX_LENGTH = 20
+
+# Fields that feed the type-ahead prefix index for each collection
+USER_PREFIX_FIELDS = ['fullName', 'username', 'skills']
+PROJECT_PREFIX_FIELDS = ['title', 'tags']
+
+SEARCH_MODES = ('auto', 'text', 'prefix')
+
+def tokenize(text):
+    """Split text into lowercase word tokens"""
+    return re.findall(r'\w+', text.lower())
+
+def build_search_prefixes(doc, fields):
+    """Build the sorted list of word prefixes indexed for type-ahead search"""
+    prefixes = set()
+    for field in fields:
+        value = doc.get(field)
+        if not value:
+            continue
+        values = value if isinstance(value, list) else [value]
+        for item in values:
+            for token in tokenize(str(item)):
+                token = token[:MAX_PREFIX_LENGTH]
+                prefixes.update(token[:i] for i in range(1, len(token) + 1))
+    return sorted(prefixes)
+
+def text_filter(search):
+    """Filter served by the collection's text index"""
+    return {'$text': {'$search': search}}
+
+def prefix_filter(search):
+    """Filter served by the prefix index; every search word must prefix-match"""
+    tokens = [token[:MAX_PREFIX_LENGTH] for token in tokenize(search)]
+    if not tokens:
+        return {PREFIX_FIELD: {'$in': []}}
+    return {PREFIX_FIELD: {'$all': tokens}}
+
+def text_score_projection():
+    """Projection that exposes the text relevance score"""
+    return {'score': {'$meta': 'textScore'}}
+
+def text_score_sort():
+    """Sort spec ranking text matches by relevance"""
+    return [('score', {'$meta': 'textScore'}), ('_id', -1)]
+
+def search_plan(search, mode='auto'):
+    """Return the ordered list of (mode, filter) attempts for a search string
+
+    'auto' tries the text index first (whole words, ranked by textScore) and
+    falls back to the prefix index so partially typed words still match.
+    """
+    if mode not in SEARCH_MODES:
+        raise ValueError(f'mode must be one of {", ".join(SEARCH_MODES)}')
+
+    plan = []
+    if mode in ('auto', 'text'):
+        plan.append(('text', text_filter(search)))
+    if mode in ('auto', 'prefix'):
+        plan.append(('prefix', prefix_filter(search)))
+    return plan
+
+def resolve_search(collection, search, mode='auto', base_query=None, count=None):
+    """Pick the first strategy in the search plan that has matches
+
+    count(collection, query) must return (total, approximate) and defaults to
+    an exact count_documents. Returns (mode, query, total, approximate) where
+    query already includes base_query.
+    """
+    if count is None:
+        count = lambda coll, q: (coll.count_documents(q), False)
+
+    plan = search_plan(search, mode)
+    for i, (search_mode, search_query) in enumerate(plan):
+        query = {**(base_query or {}), **search_query}
+        total, approximate = count(collection, query)
+        if total or i == len(plan) - 1:
+            return search_mode, query, total, approximate
+
+async def resolve_search_async(collection, search, mode, base_query, count):
+    """resolve_search() for an async collection; all plan counts run concurrently"""
+    plan = [
+        (search_mode, {**(base_query or {}), **search_query})
+        for search_mode, search_query in search_plan(search, mode)
+    ]
+    counts = await asyncio.gather(*(count(collection, query) for _, query in plan))
+    for i, ((search_mode, query), (total, approximate)) in enumerate(zip(plan, counts)):
+        if total or i == len(plan) - 1:
+            return search_mode, query, total, approximate
+
+def backfill_search_prefixes(collection, fields, batch_size=500):
+    """Populate the prefix field on documents written before it existed"""
+    projection = {field: 1 for field in fields}
+    operations = []
+    updated = 0
+    for doc in collection.find({PREFIX_FIELD: {'$exists': False}}, projection):
+        operations.append(UpdateOne(
+            {'_id': doc['_id']},
+            {'$set': {PREFIX_FIELD: build_search_prefixes(doc, fields)}}
+        ))
+        if len(operations) >= batch_size:
+            updated += collection.bulk_write(operations, ordered=False).modified_count
+            operations = []
+    if operations:
+        updated += collection.bulk_write(operations, ordered=False).modified_count
+    return updated
+
+if __name__ == '__main__':
+    from models import users_collection, projects_collection
+    users = backfill_search_prefixes(users_collection, USER_PREFIX_FIELDS)
+    projects = backfill_search_prefixes(projects_collection, PROJECT_PREFIX_FIELDS)
+    print(f"Search prefixes backfilled for {users} users and {projects} projects!")
@@ -0,0 +1,27 @@
+import json
+from flask.json.provider import DefaultJSONProvider
+from utils import json_default
+
+try:
+    import orjson  # optional dependency, several times faster than json
+except ImportError:
+    orjson = None
+
+# Naive datetimes from PyMongo are UTC; emit them as ISO 8601 with a Z
+ORJSON_OPTIONS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z if orjson else 0
+
+def dumps(obj):
+    """Encode to JSON bytes; ObjectId and datetime are handled at any depth"""
+    if orjson:
+        return orjson.dumps(obj, default=json_default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=json_default, separators=(',', ':')).encode()
+
+class BSONJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by dumps(), so jsonify accepts raw documents"""
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj), mimetype=self.mimetype)
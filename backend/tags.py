@@ -0,0 +1,66 @@
+"""Per-tag project counts
+
+One tag_counts document per tag, {_id: tag, count}, kept current with $inc
+bulk writes as projects are created, edited and deleted:
+
+    python tags.py --rebuild   # recount from projects_collection to repair drift
+"""
+import sys
+from collections import Counter
+from pymongo import UpdateOne
+
+class TagCounter:
+    """Project counts per tag, read from a small indexed collection"""
+
+    def __init__(self, tag_counts_collection, projects_collection):
+        self.tag_counts = tag_counts_collection
+        self.projects = projects_collection
+
+    def create_indexes(self):
+        self.tag_counts.create_index([("count", -1), ("_id", 1)])
+
+    def apply(self, added=(), removed=()):
+        """$inc the tags a write added and removed in one bulk_write
+
+        Pass a new project's tags as added, a deleted one's as removed, and
+        both lists for an edit; tags in both cancel out.
+        """
+        delta = Counter(set(added))
+        delta.subtract(set(removed))
+        operations = [
+            UpdateOne({'_id': tag}, {'$inc': {'count': change}}, upsert=change > 0)
+            for tag, change in delta.items() if change
+        ]
+        if operations:
+            self.tag_counts.bulk_write(operations, ordered=False)
+            # Tags whose last project went away
+            if any(change < 0 for change in delta.values()):
+                self.tag_counts.delete_many({'count': {'$lte': 0}})
+        return len(operations)
+
+    def top(self, limit=50):
+        """Most used tags as [{'tag', 'count'}], read in index order"""
+        return [
+            {'tag': doc['_id'], 'count': doc['count']}
+            for doc in self.tag_counts.find({'count': {'$gt': 0}}).sort([('count', -1), ('_id', 1)]).limit(limit)
+        ]
+
+    def rebuild(self):
+        """Recount every tag from the projects; returns the number of tags"""
+        self.projects.aggregate([
+            # A tag repeated on one project counts once, as in apply()
+            {'$project': {'tags': {'$setUnion': ['$tags', []]}}},
+            {'$unwind': '$tags'},
+            {'$group': {'_id': '$tags', 'count': {'$sum': 1}}},
+            {'$out': self.tag_counts.name}
+        ])
+        return self.tag_counts.estimated_document_count()
+
+if __name__ == '__main__':
+    from models import tag_counter
+
+    if '--rebuild' in sys.argv:
+        print(f"Counted {tag_counter.rebuild()} tags")
+    else:
+        for entry in tag_counter.top():
+            print(f"{entry['count']:8d}  {entry['tag']}")
@@ -0,0 +1,73 @@
+import os
+import sys
+import threading
+from datetime import datetime
+import mongomock
+import pymongo
+import pytest
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Every MongoClient the app creates shares one in-memory server
+_client = mongomock.MongoClient()
+pymongo.MongoClient = lambda *args, **kwargs: _client
+
+# mongomock writes '_id' back into the projection dict it is given, which
+# would corrupt the shared module-level projections; pymongo never mutates them
+_copy_only_fields = mongomock.collection.Collection._copy_only_fields
+mongomock.collection.Collection._copy_only_fields = (
+    lambda self, doc, fields, container: _copy_only_fields(self, doc, dict(fields) if fields else fields, container)
+)
+
+@pytest.fixture
+def models():
+    """models.py on an empty database with its indexes and caches reset"""
+    import models
+    from counts import count_cache
+
+    for name in models.db.list_collection_names():
+        models.db.drop_collection(name)
+    models.create_indexes()
+    models.read_cache.clear()
+    count_cache.clear()
+    return models
+
+@pytest.fixture
+def client(models):
+    """Flask test client for app.py on the same empty database"""
+    from app import app
+    return app.test_client()
+
+@pytest.fixture
+def make_project(models):
+    """Create a project through the model layer; returns its id"""
+    def make(title, created_at=None, tags=('python',), author_id=None, **fields):
+        return models.ProjectModel.create_project({
+            'title': title,
+            'description': f'{title} description',
+            'tags': list(tags),
+            'authorId': author_id or ObjectId(),
+            'author': {'name': 'Ada', 'username': 'ada', 'avatar': ''},
+            'stars': 0,
+            'views': 0,
+            'createdAt': created_at or datetime.utcnow(),
+            **fields
+        })
+    return make
+
+def run_concurrently(target, args_list):
+    """Call target once per argument tuple, all threads released together"""
+    barrier = threading.Barrier(len(args_list))
+    results = [None] * len(args_list)
+
+    def run(i, args):
+        barrier.wait()
+        results[i] = target(*args)
+
+    threads = [threading.Thread(target=run, args=(i, args)) for i, args in enumerate(args_list)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
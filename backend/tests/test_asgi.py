@@ -0,0 +1,126 @@
+import asyncio
+import gzip
+import hashlib
+import os
+import pytest
+
+pytest.importorskip('motor')
+
+import asgi
+from serialization import dumps
+
+def respond(body, request_headers=None, tag=True):
+    """Run send_json and return (status, headers, body)"""
+    messages = []
+
+    async def send(message):
+        messages.append(message)
+
+    asyncio.run(asgi.send_json(send, body, 200, request_headers, tag=tag))
+    start, content = messages
+    return start['status'], dict(start['headers']), content['body']
+
+def test_tagged_responses_carry_a_body_hash_and_answer_304(monkeypatch):
+    monkeypatch.setattr(asgi.Config, 'COMPRESSION_ENABLED', False)
+    status, headers, body = respond({'projects': []})
+    assert status == 200 and body == dumps({'projects': []})
+    assert headers[b'cache-control'] == b'no-cache'
+    etag = headers[b'etag']
+
+    status, headers, body = respond({'projects': []}, {b'if-none-match': etag})
+    assert (status, body) == (304, b'')
+    assert headers[b'etag'] == etag
+    assert b'content-length' not in headers
+
+    assert respond({'projects': [1]}, {b'if-none-match': etag})[0] == 200
+
+def test_compressed_responses_get_a_weak_etag_that_still_validates(monkeypatch):
+    monkeypatch.setattr(asgi.Config, 'COMPRESSION_ENABLED', True)
+    payload = {'projects': ['x' * 100] * 100}
+    status, headers, body = respond(payload, {b'accept-encoding': b'gzip'})
+    assert headers[b'content-encoding'] == b'gzip'
+    assert gzip.decompress(body) == dumps(payload)
+    assert headers[b'etag'].startswith(b'W/')
+
+    assert respond(payload, {b'if-none-match': headers[b'etag']})[0] == 304
+
+def test_untagged_responses_have_no_validators():
+    headers = respond({'users': []}, tag=False)[1]
+    assert b'etag' not in headers and b'cache-control' not in headers
+
+def fetch(path, headers=(), extensions=None):
+    """Drive asgi.application with one GET; returns (status, headers, body, messages)"""
+    scope = {
+        'type': 'http', 'method': 'GET', 'path': path, 'raw_path': path.encode(), 'query_string': b'',
+        'root_path': '', 'scheme': 'http', 'server': ('testserver', 80), 'client': ('127.0.0.1', 1234),
+        'http_version': '1.1', 'asgi': {'version': '3.0'}, 'headers': list(headers)
+    }
+    if extensions:
+        scope['extensions'] = extensions
+    messages = []
+
+    async def run():
+        request_sent = False
+
+        async def receive():
+            nonlocal request_sent
+            if not request_sent:
+                request_sent = True
+                return {'type': 'http.request', 'body': b'', 'more_body': False}
+            await asyncio.Event().wait()
+
+        async def send(message):
+            messages.append(message)
+
+        await asgi.application(scope, receive, send)
+
+    asyncio.run(run())
+    start = messages[0]
+    body = b''.join(message.get('body', b'') for message in messages[1:])
+    return start['status'], dict(start['headers']), body, messages
+
+@pytest.fixture
+def stored(tmp_path, monkeypatch):
+    monkeypatch.setattr(asgi.Config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setattr(asgi.Config, 'UPLOAD_ACCEL_REDIRECT', '')
+    data = os.urandom(asgi.UPLOAD_CHUNK_SIZE * 2 + 10)
+    name = hashlib.sha256(data).hexdigest() + '.pdf'
+    (tmp_path / name).write_bytes(data)
+    return name, data
+
+def test_stored_files_stream_in_chunks_with_immutable_caching(stored):
+    name, data = stored
+    status, headers, body, messages = fetch('/uploads/' + name)
+    assert status == 200 and body == data
+    assert len(messages) == 4
+    assert headers[b'content-type'] == b'application/pdf'
+    assert headers[b'cache-control'] == b'public, max-age=31536000, immutable'
+    assert headers[b'etag'] == f'"{name.split(".")[0]}"'.encode()
+    assert headers[b'content-length'] == str(len(data)).encode()
+
+def test_stored_files_answer_ranges_and_revalidation(stored):
+    name, data = stored
+    status, headers, body, _ = fetch('/uploads/' + name, [(b'range', b'bytes=10-19')])
+    assert (status, body) == (206, data[10:20])
+    assert headers[b'content-range'] == f'bytes 10-19/{len(data)}'.encode()
+
+    stale = [(b'range', b'bytes=10-19'), (b'if-range', b'"other"')]
+    assert fetch('/uploads/' + name, stale)[0] == 200
+    assert fetch('/uploads/' + name, [(b'range', b'bytes=99999999-')])[0] == 416
+
+    etag = fetch('/uploads/' + name)[1][b'etag']
+    status, _, body, _ = fetch('/uploads/' + name, [(b'if-none-match', etag)])
+    assert (status, body) == (304, b'')
+
+def test_stored_files_use_zero_copy_send_when_offered(stored):
+    name, data = stored
+    status, _, _, messages = fetch(
+        '/uploads/' + name, [(b'range', b'bytes=5-')], {'http.response.zerocopysend': {}}
+    )
+    assert status == 206
+    assert messages[1]['type'] == 'http.response.zerocopysend'
+    assert (messages[1]['offset'], messages[1]['count']) == (5, len(data) - 5)
+
+def test_missing_and_unsafe_upload_paths_fall_back_to_flask(stored):
+    assert fetch('/uploads/' + 'f' * 64 + '.pdf')[0] == 404
+    assert fetch('/uploads/../config.py')[0] == 404
@@ -0,0 +1,46 @@
+import gzip
+from flask import Flask, Response, jsonify
+from cache import MemoryCache
+from compression import Compressor
+
+def test_compressor_negotiates_and_skips_small_bodies():
+    compressor = Compressor(min_size=100)
+    assert compressor.negotiate('gzip;q=0, identity') is None
+    assert compressor.negotiate('gzip, deflate') == 'gzip'
+    assert compressor.compress(b'x' * 10, 'gzip') == (None, b'x' * 10)
+
+    codec, data = compressor.compress(b'{"a": 1}' * 100, 'gzip')
+    assert codec == 'gzip' and gzip.decompress(data) == b'{"a": 1}' * 100
+    assert compressor.stats()['responses'] == 1
+
+def test_cacheable_bodies_are_compressed_once():
+    calls = []
+    compressor = Compressor(min_size=10, cache=MemoryCache())
+    gzip_codec = compressor.codecs['gzip']
+    compressor.codecs['gzip'] = lambda body: calls.append(body) or gzip_codec(body)
+
+    body = b'{"a": 1}' * 100
+    first = compressor.compress(body, 'gzip', cacheable=True)
+    assert compressor.compress(body, 'gzip', cacheable=True) == first
+    assert len(calls) == 1
+    compressor.compress(body, 'gzip')
+    assert len(calls) == 2
+
+def test_compress_response_weakens_etag_and_skips_streams():
+    app = Flask(__name__)
+    compressor = Compressor(min_size=10)
+    with app.test_request_context():
+        response = jsonify({'items': ['x' * 50] * 10})
+        response.add_etag()
+        compressor.compress_response(response, 'gzip')
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert response.get_etag()[1] is True
+        assert 'Accept-Encoding' in response.vary
+
+        streamed = Response(iter([b'{}'] * 10), mimetype='application/json')
+        compressor.compress_response(streamed, 'gzip')
+        assert 'Content-Encoding' not in streamed.headers
+
+        image = Response(b'x' * 100, mimetype='image/png')
+        compressor.compress_response(image, 'gzip')
+        assert 'Content-Encoding' not in image.headers
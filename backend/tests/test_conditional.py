@@ -0,0 +1,43 @@
+from bson import ObjectId
+
+def test_project_detail_answers_if_none_match_with_304(client, make_project):
+    project_id = make_project('p')
+    response = client.get(f'/api/projects/{project_id}')
+    assert response.status_code == 200
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert 'no-cache' in response.headers['Cache-Control']
+
+    cached = client.get(f'/api/projects/{project_id}', headers={'If-None-Match': etag})
+    assert cached.status_code == 304
+    assert cached.data == b''
+    assert cached.headers['ETag'] == etag
+
+def test_project_detail_etag_changes_when_the_project_is_starred(client, models, make_project):
+    project_id = make_project('p')
+    etag = client.get(f'/api/projects/{project_id}').headers['ETag']
+    models.StarModel.toggle_star(ObjectId(), project_id)
+    response = client.get(f'/api/projects/{project_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()['project']['stars'] == 1
+
+def test_user_profile_answers_if_modified_since_with_304(client, models):
+    models.UserModel.create_user({
+        'fullName': 'Ada', 'username': 'ada', 'email': 'ada@example.com', 'password': 'x'
+    })
+    response = client.get('/api/users/ada')
+    assert response.status_code == 200
+    last_modified = response.headers['Last-Modified']
+
+    cached = client.get('/api/users/ada', headers={'If-Modified-Since': last_modified})
+    assert cached.status_code == 304
+    assert client.get('/api/users/ada', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+def test_project_list_is_tagged_with_a_body_hash(client, make_project):
+    make_project('p')
+    response = client.get('/api/projects')
+    etag = response.headers['ETag']
+    assert client.get('/api/projects', headers={'If-None-Match': etag}).status_code == 304
+
+    make_project('q')
+    assert client.get('/api/projects', headers={'If-None-Match': etag}).status_code == 200
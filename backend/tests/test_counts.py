@@ -0,0 +1,57 @@
+from counts import CountCache
+
+class CountingCollection:
+    """Collection stand-in that records how often it was counted"""
+
+    def __init__(self, name, total):
+        self.name = name
+        self.total = total
+        self.counts = 0
+
+    def count_documents(self, query):
+        self.counts += 1
+        return self.total
+
+    def estimated_document_count(self):
+        return self.total
+
+def test_count_cache_hits_until_ttl():
+    collection = CountingCollection('projects', 7)
+    cache = CountCache(ttl=60)
+    assert cache.count(collection, {'tags': 'x'}) == (7, False)
+    assert cache.count(collection, {'tags': 'x'}) == (7, True)
+    assert collection.counts == 1
+
+    expired = CountCache(ttl=0)
+    expired.count(collection, {'tags': 'x'})
+    expired.count(collection, {'tags': 'x'})
+    assert collection.counts == 3
+
+def test_count_cache_normalizes_key_order():
+    collection = CountingCollection('projects', 3)
+    cache = CountCache()
+    cache.count(collection, {'a': 1, 'b': 2})
+    assert cache.count(collection, {'b': 2, 'a': 1}) == (3, True)
+
+def test_count_cache_invalidate_and_evict():
+    projects, users = CountingCollection('projects', 1), CountingCollection('users', 1)
+    cache = CountCache(max_entries=2)
+    cache.count(projects, {'a': 1})
+    cache.count(users, {'a': 1})
+    cache.invalidate('projects')
+    assert cache.count(users, {'a': 1})[1] is True
+    assert cache.count(projects, {'a': 1})[1] is False
+
+    cache.count(projects, {'b': 1})  # third entry evicts the least recently used
+    assert cache.count(users, {'a': 1})[1] is False
+
+def test_count_cache_empty_query_uses_estimate():
+    collection = CountingCollection('projects', 9)
+    assert CountCache().count(collection, {}) == (9, True)
+    assert collection.counts == 0
+
+def test_creating_a_project_invalidates_cached_totals(models, make_project):
+    make_project('first')
+    assert models.ProjectModel.list_projects(tag='python')[1] == 1
+    make_project('second')
+    assert models.ProjectModel.list_projects(tag='python')[1] == 2
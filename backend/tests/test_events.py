@@ -0,0 +1,54 @@
+import asyncio
+import json
+import pytest
+from events import InProcessBroker, RedisBroker, check_broker, create_broker
+
+def frame_data(frame):
+    event, data = frame.strip().split('\n')
+    return event, json.loads(data[len('data: '):])
+
+def test_in_process_broker_delivers_to_each_channels_subscribers():
+    broker = InProcessBroker()
+    alice, bob = broker.subscribe('alice'), broker.subscribe('bob')
+    broker.publish(['alice'], 'message', {'text': 'hi'})
+
+    assert frame_data(alice.queue.get_nowait()) == ('event: message', {'text': 'hi'})
+    assert bob.queue.empty()
+    alice.close()
+    assert broker.subscriber_count() == 1
+
+def test_stream_ends_and_unsubscribes_when_a_client_falls_behind():
+    broker = InProcessBroker()
+    subscription = broker.subscribe('alice')
+    subscription.overflowed = True
+    assert list(subscription.stream()) == [': connected\n\n']
+    assert broker.subscriber_count() == 0
+
+def test_async_subscriptions_receive_frames_published_from_other_threads():
+    async def receive():
+        broker = InProcessBroker()
+        stream = broker.subscribe_async('alice').stream()
+        assert await stream.__anext__() == ': connected\n\n'
+        await asyncio.to_thread(broker.publish, ['alice'], 'message', {'text': 'hi'})
+        frame = await stream.__anext__()
+        await stream.aclose()
+        return frame, broker.subscriber_count()
+
+    frame, remaining = asyncio.run(receive())
+    assert frame_data(frame) == ('event: message', {'text': 'hi'})
+    assert remaining == 0
+
+def test_several_workers_without_a_broker_warn_but_start():
+    with pytest.warns(RuntimeWarning, match='EVENT_BROKER_URL'):
+        assert check_broker(None, 3) is False
+    with pytest.warns(RuntimeWarning):
+        assert isinstance(create_broker(None, 3), InProcessBroker)
+
+def test_single_worker_or_redis_needs_no_warning(recwarn):
+    assert check_broker(None, 1) and check_broker('redis://localhost:6379/1', 3)
+    assert isinstance(create_broker(None, 1), InProcessBroker)
+    assert not recwarn.list
+
+def test_broker_url_selects_redis():
+    pytest.importorskip('redis')
+    assert isinstance(create_broker('redis://localhost:6379/1', 3), RedisBroker)
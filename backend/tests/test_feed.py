@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from feed import FeedService
+
+@pytest.fixture
+def feed(models):
+    return FeedService(
+        models.users_collection, models.follows_collection, models.projects_collection,
+        models.timelines_collection, celebrity_followers=3
+    )
+
+def make_users(models, *followers):
+    return [models.users_collection.insert_one(
+        {'username': f'u{i}', 'email': f'u{i}@example.com', 'followers': count}
+    ).inserted_id for i, count in enumerate(followers)]
+
+def follow(models, follower_id, author_id):
+    models.follows_collection.insert_one({'followerId': follower_id, 'followingId': author_id})
+
+def post(models, feed, author_id, title, created_at):
+    project = {'title': title, 'authorId': author_id, 'createdAt': created_at}
+    project['_id'] = models.projects_collection.insert_one(project).inserted_id
+    followers = models.users_collection.find_one({'_id': author_id})['followers']
+    return feed.fan_out(project, followers)
+
+def read_all(feed, user_id, limit):
+    titles, cursor = [], ''
+    while True:
+        projects, cursor = feed.page(user_id, cursor, limit, {'title': 1})
+        titles += [project['title'] for project in projects]
+        if cursor is None:
+            return titles
+
+def test_fan_out_writes_timelines_and_skips_celebrities(models, feed):
+    me, author, celebrity = make_users(models, 0, 1, 3)
+    follow(models, me, author)
+    follow(models, me, celebrity)
+
+    assert post(models, feed, author, 'regular', datetime(2024, 5, 1)) == 1
+    assert post(models, feed, celebrity, 'famous', datetime(2024, 5, 2)) is None
+    assert models.timelines_collection.count_documents({}) == 1
+    assert read_all(feed, me, 10) == ['famous', 'regular']
+
+def test_feed_pages_merge_timeline_and_celebrity_projects_once(models, feed):
+    me, author, celebrity, stranger = make_users(models, 0, 1, 3, 3)
+    follow(models, me, author)
+    follow(models, me, celebrity)
+
+    base = datetime(2024, 5, 1)
+    expected = []
+    for i in range(9):
+        # Authors alternate and every pair shares a createdAt
+        author_id = [author, celebrity, stranger][i % 3]
+        post(models, feed, author_id, f'p{i}', base + timedelta(hours=i // 2))
+        if author_id != stranger:
+            expected.append(f'p{i}')
+
+    project_ids = {p['title']: p['_id'] for p in models.projects_collection.find()}
+    expected.sort(key=lambda title: (base + timedelta(hours=int(title[1:]) // 2), project_ids[title]), reverse=True)
+    for limit in (1, 2, 4, 10):
+        assert read_all(feed, me, limit) == expected
+
+def test_remove_author_drops_only_that_authors_entries(models, feed):
+    me, a, b = ObjectId(), ObjectId(), ObjectId()
+    models.timelines_collection.insert_many([
+        {'userId': me, 'authorId': a, 'projectId': ObjectId(), 'createdAt': datetime(2024, 5, 1)},
+        {'userId': me, 'authorId': b, 'projectId': ObjectId(), 'createdAt': datetime(2024, 5, 1)}
+    ])
+    feed.remove_author(me, a)
+    assert [entry['authorId'] for entry in models.timelines_collection.find()] == [b]
+
+def test_malformed_feed_cursor_raises_value_error(feed):
+    with pytest.raises(ValueError):
+        feed.page(ObjectId(), 'zzz')
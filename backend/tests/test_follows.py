@@ -0,0 +1,47 @@
+from bson import ObjectId
+from follows import FollowService
+
+def make_users(models, count):
+    return [
+        models.users_collection.insert_one({'username': f'u{i}', 'email': f'u{i}@example.com', 'followers': 0, 'following': 0}).inserted_id
+        for i in range(count)
+    ]
+
+def counters(models, user_id):
+    user = models.users_collection.find_one({'_id': user_id})
+    return user['followers'], user['following']
+
+def test_follow_many_reports_each_target(models):
+    me, a, b = make_users(models, 3)
+    service = FollowService(models.users_collection, models.follows_collection)
+    models.follows_collection.insert_one({'followerId': me, 'followingId': a})
+    missing = ObjectId()
+
+    result = service.follow_many(str(me), [str(a), str(b), str(missing)])
+    assert result == {'followed': [b], 'alreadyFollowing': [a], 'notFound': [missing]}
+    assert models.follows_collection.count_documents({'followerId': me}) == 2
+    assert counters(models, me) == (0, 1)
+    assert counters(models, b) == (1, 0)
+    assert counters(models, a) == (0, 0)
+
+def test_follow_many_skips_self_and_duplicates(models):
+    me, a = make_users(models, 2)
+    service = FollowService(models.users_collection, models.follows_collection)
+    assert service.follow_many(me, [me, a, str(a), a]) == {'followed': [a], 'alreadyFollowing': [], 'notFound': []}
+    assert counters(models, me) == (0, 1)
+    assert counters(models, a) == (1, 0)
+
+def test_follow_many_for_a_missing_follower_returns_none(models):
+    a, = make_users(models, 1)
+    service = FollowService(models.users_collection, models.follows_collection)
+    assert service.follow_many(ObjectId(), [a]) is None
+    assert models.follows_collection.count_documents({}) == 0
+
+def test_toggle_keeps_counters_in_step_with_edges(models):
+    me, a = make_users(models, 2)
+    service = FollowService(models.users_collection, models.follows_collection)
+    assert service.toggle(me, a) is True
+    assert (counters(models, me), counters(models, a)) == ((0, 1), (1, 0))
+    assert service.toggle(me, a) is False
+    assert (counters(models, me), counters(models, a)) == ((0, 0), (0, 0))
+    assert service.toggle(me, ObjectId()) is None
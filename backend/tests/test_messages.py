@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta
+from bson import ObjectId
+
+def create_messages(models, conversation_id, count):
+    base = datetime(2024, 5, 1)
+    # Pairs share a createdAt, so only the _id tie-breaker orders them
+    return [models.MessageModel.create_message({
+        'conversationId': conversation_id, 'text': str(i), 'createdAt': base + timedelta(seconds=i // 2)
+    }) for i in range(count)]
+
+def texts(page):
+    messages, has_more = page
+    return [message['text'] for message in messages], has_more
+
+def test_message_pages_walk_back_by_cursor(models):
+    conversation_id = ObjectId()
+    ids = create_messages(models, conversation_id, 7)
+    get = models.MessageModel.get_conversation_messages
+
+    assert texts(get(conversation_id, limit=3)) == (['4', '5', '6'], True)
+    assert texts(get(conversation_id, before=ids[4], limit=3)) == (['1', '2', '3'], True)
+    assert texts(get(conversation_id, before=ids[1], limit=3)) == (['0'], False)
+
+def test_message_pages_poll_forward_since_a_message(models):
+    conversation_id = ObjectId()
+    ids = create_messages(models, conversation_id, 7)
+    get = models.MessageModel.get_conversation_messages
+
+    assert texts(get(conversation_id, after=ids[3], limit=10)) == (['4', '5', '6'], False)
+    assert texts(get(conversation_id, after=ids[0], limit=2)) == (['1', '2'], True)
+    assert texts(get(conversation_id, after=ids[6])) == ([], False)
+
+def test_message_cursor_from_another_conversation_is_rejected(models):
+    other = create_messages(models, ObjectId(), 1)[0]
+    assert models.MessageModel.get_conversation_messages(ObjectId(), before=other) is None
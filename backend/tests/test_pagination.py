@@ -0,0 +1,58 @@
+from datetime import datetime, timedelta
+import pytest
+from bson import ObjectId
+from utils import decode_cursor, encode_cursor, keyset_filter
+
+def test_cursor_round_trip():
+    created_at, doc_id = datetime(2024, 5, 1, 12, 30, 15, 123000), ObjectId()
+    assert decode_cursor(encode_cursor(created_at, doc_id)) == (created_at, doc_id)
+
+def test_cursor_is_url_safe():
+    cursor = encode_cursor(datetime(2024, 5, 1), ObjectId())
+    assert '=' not in cursor and '+' not in cursor and '/' not in cursor
+
+@pytest.mark.parametrize('cursor', ['', 'zzz', encode_cursor(datetime(2024, 5, 1), ObjectId())[:-4]])
+def test_malformed_cursor_raises_value_error(cursor):
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+def test_keyset_filter_breaks_ties_on_id():
+    created_at, doc_id = datetime(2024, 5, 1), ObjectId()
+    assert keyset_filter(created_at, doc_id) == {'$or': [
+        {'createdAt': {'$lt': created_at}},
+        {'createdAt': created_at, '_id': {'$lt': doc_id}}
+    ]}
+    newer = keyset_filter(created_at, doc_id, older=False, id_field='projectId')
+    assert newer['$or'][1] == {'createdAt': created_at, 'projectId': {'$gt': doc_id}}
+
+def test_project_cursor_pages_cover_ties_exactly_once(models, make_project):
+    base = datetime(2024, 5, 1)
+    # Pairs share a createdAt, so only the _id tie-breaker orders them
+    for i in range(11):
+        make_project(f'p{i}', base + timedelta(minutes=i // 2))
+
+    seen, cursor = [], ''
+    while True:
+        projects, total, _, _, cursor = models.ProjectModel.list_projects(cursor=cursor, limit=3)
+        seen += [project['title'] for project in projects]
+        if not cursor:
+            break
+
+    assert total == 11
+    expected = sorted(models.projects_collection.find(), key=lambda p: (p['createdAt'], p['_id']), reverse=True)
+    assert seen == [project['title'] for project in expected]
+
+def test_project_pages_reject_malformed_cursors(models):
+    with pytest.raises(ValueError):
+        models.ProjectModel.list_projects(cursor='zzz')
+
+def test_project_pages_keep_projects_whose_author_is_gone(models, make_project):
+    make_project('orphan')
+    projects = models.ProjectModel.list_projects()[0]
+    assert [project['title'] for project in projects] == ['orphan']
+    assert projects[0]['author'] == {'name': 'Ada', 'username': 'ada', 'avatar': ''}
+
+def test_project_pages_join_current_author_details(models, make_project):
+    author_id = models.users_collection.insert_one({'fullName': 'Grace', 'username': 'grace', 'avatar': 'g.png'}).inserted_id
+    make_project('p', author_id=author_id)
+    assert models.ProjectModel.list_projects()[0][0]['author'] == {'name': 'Grace', 'username': 'grace', 'avatar': 'g.png'}
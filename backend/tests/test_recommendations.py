@@ -0,0 +1,65 @@
+from datetime import datetime
+import pytest
+
+pytest.importorskip('scipy')
+
+from bson import ObjectId
+from recommendations import FollowRecommender, normalize_skill
+
+@pytest.fixture
+def graph(models):
+    """a and b share rare skills, a follows c, c follows d, e is inactive"""
+    users = {}
+    for name, skills, active in [
+        ('a', ['Python', 'Rust'], True),
+        ('b', ['python', ' rust '], True),
+        ('c', ['python'], True),
+        ('d', ['go'], True),
+        ('e', ['python', 'rust'], False)
+    ]:
+        users[name] = models.users_collection.insert_one({
+            'username': name, 'email': f'{name}@example.com', 'skills': skills, 'isActive': active
+        }).inserted_id
+    models.follows_collection.insert_many([
+        {'followerId': users['a'], 'followingId': users['c']},
+        {'followerId': users['c'], 'followingId': users['d']}
+    ])
+    return users
+
+def recommender(models, **kwargs):
+    return FollowRecommender(models.users_collection, models.follows_collection, models.suggestions_collection, **kwargs)
+
+def suggestions(models, user_id):
+    return models.suggestions_collection.find_one({'_id': user_id})['suggestions']
+
+def test_normalize_skill():
+    assert normalize_skill('  Machine   Learning ') == 'machine learning'
+
+def test_run_blends_skills_and_friends_of_friends(models, graph):
+    stats = recommender(models).run()
+    assert stats['users'] == 4
+
+    names = {user_id: name for name, user_id in graph.items()}
+    ranked = [(names[s['userId']], s['mutual']) for s in suggestions(models, graph['a'])]
+    # Never yourself, someone you follow, or an inactive user
+    assert {name for name, _ in ranked} == {'b', 'd'}
+    assert ranked[0] == ('b', 0)
+    assert dict(ranked)['d'] == 1
+    assert models.suggestions_collection.find_one({'_id': graph['e']}) is None
+
+def test_blocks_and_top_k_do_not_change_the_best_suggestions(models, graph):
+    recommender(models).run()
+    whole = {doc['_id']: doc['suggestions'] for doc in models.suggestions_collection.find()}
+
+    # A zero budget computes one user per block
+    stats = recommender(models, memory_mb=0, top_k=1).run()
+    assert stats['blocks'] == 4
+    for doc in models.suggestions_collection.find():
+        # Equal scores may tie-break differently, so compare the scores
+        assert [s['score'] for s in doc['suggestions']] == [s['score'] for s in whole[doc['_id']][:1]]
+
+def test_run_drops_suggestions_of_users_no_longer_active(models, graph):
+    stale = ObjectId()
+    models.suggestions_collection.insert_one({'_id': stale, 'suggestions': [], 'computedAt': datetime(2020, 1, 1)})
+    recommender(models).run()
+    assert models.suggestions_collection.find_one({'_id': stale}) is None
@@ -0,0 +1,40 @@
+from bson import ObjectId
+from related import NUM_PERMUTATIONS, BANDS, RelatedIndex, band_keys, minhash, project_tokens, similarity
+
+def test_project_tokens_drop_stop_words_and_prefix_tags():
+    tokens = project_tokens({'title': 'A React app', 'description': 'Built with C++ and Node.js', 'tags': ['React']})
+    assert tokens == {'react', 'built', 'c++', 'node.js', 'tag:react'}
+
+def test_minhash_is_deterministic():
+    tokens = {'python', 'flask', 'mongodb'}
+    assert minhash(tokens) == minhash(set(tokens))
+    assert len(minhash(tokens)) == NUM_PERMUTATIONS
+    assert len(band_keys(minhash(tokens))) == BANDS
+
+def test_similarity_estimates_jaccard():
+    a = {f'word{i}' for i in range(100)}
+    b = {f'word{i}' for i in range(50, 150)}  # Jaccard 50 / 150
+    assert similarity(minhash(a), minhash(a)) == 1.0
+    assert abs(similarity(minhash(a), minhash(b)) - 1 / 3) < 0.2
+    assert similarity(minhash(a), minhash({f'other{i}' for i in range(100)})) < 0.1
+
+def test_related_index_links_similar_projects_both_ways(models):
+    index = RelatedIndex(models.related_projects_collection, models.projects_collection, top_k=2)
+    chat = {'_id': ObjectId(), 'title': 'Realtime chat', 'description': 'websocket chat server', 'tags': ['node', 'chat']}
+    chat2 = {'_id': ObjectId(), 'title': 'Realtime chat client', 'description': 'websocket chat', 'tags': ['node', 'chat']}
+    other = {'_id': ObjectId(), 'title': 'Recipe planner', 'description': 'meal plans', 'tags': ['food']}
+    for project in (chat, other, chat2):
+        index.add(project)
+
+    assert [entry['projectId'] for entry in index.related(chat2['_id'])] == [chat['_id']]
+    assert [entry['projectId'] for entry in index.related(chat['_id'])] == [chat2['_id']]
+    assert index.related(other['_id']) == []
+
+def test_rebuild_reindexes_every_project(models, make_project):
+    chat = make_project('Realtime chat', tags=('node', 'chat'), description='websocket chat server')
+    chat2 = make_project('Realtime chat client', tags=('node', 'chat'), description='websocket chat')
+    models.related_projects_collection.delete_many({})
+
+    index = RelatedIndex(models.related_projects_collection, models.projects_collection)
+    assert index.rebuild() == 2
+    assert [entry['projectId'] for entry in index.related(ObjectId(chat))] == [ObjectId(chat2)]
@@ -0,0 +1,37 @@
+import pytest
+from search import PREFIX_FIELD, build_search_prefixes, resolve_search, search_plan
+
+def test_search_plan_auto_tries_text_then_prefix():
+    plan = search_plan('React Nat', 'auto')
+    assert [mode for mode, _ in plan] == ['text', 'prefix']
+    assert plan[0][1] == {'$text': {'$search': 'React Nat'}}
+    assert plan[1][1] == {PREFIX_FIELD: {'$all': ['react', 'nat']}}
+
+def test_search_plan_single_mode():
+    assert [mode for mode, _ in search_plan('x', 'text')] == ['text']
+    assert [mode for mode, _ in search_plan('x', 'prefix')] == ['prefix']
+
+def test_search_plan_rejects_unknown_mode():
+    with pytest.raises(ValueError):
+        search_plan('x', 'fuzzy')
+
+def test_prefix_plan_without_words_matches_nothing():
+    assert search_plan('!!', 'prefix') == [('prefix', {PREFIX_FIELD: {'$in': []}})]
+
+def test_search_prefixes_cover_every_word_of_every_field():
+    prefixes = build_search_prefixes({'title': 'Go API', 'tags': ['web']}, ['title', 'tags', 'missing'])
+    assert prefixes == ['a', 'ap', 'api', 'g', 'go', 'w', 'we', 'web']
+
+def test_resolve_search_falls_back_to_prefix_when_text_has_no_matches():
+    counts = {'text': 0, 'prefix': 2}
+    count = lambda collection, query: (counts['text' if '$text' in query else 'prefix'], False)
+    mode, query, total, _ = resolve_search(None, 'rea', base_query={'tags': 'js'}, count=count)
+    assert (mode, total) == ('prefix', 2)
+    assert query == {'tags': 'js', PREFIX_FIELD: {'$all': ['rea']}}
+
+def test_prefix_search_finds_partially_typed_titles(models, make_project):
+    make_project('React Native starter')
+    make_project('Django blog')
+    projects, total, _, mode, _ = models.ProjectModel.list_projects(search='rea nat', mode='prefix')
+    assert (mode, total) == ('prefix', 1)
+    assert projects[0]['title'] == 'React Native starter'
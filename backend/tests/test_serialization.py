@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+import pytest
+from bson import ObjectId
+import serialization
+from serialization import dumps
+
+DOC_ID = ObjectId('65f1c0ffee0000000000beef')
+DOC = {
+    '_id': DOC_ID,
+    'createdAt': datetime(2024, 5, 1, 12, 30, 15, 123000),
+    'author': {'id': DOC_ID, 'tags': [DOC_ID]},
+    'stars': 3
+}
+EXPECTED = {
+    '_id': str(DOC_ID),
+    'createdAt': '2024-05-01T12:30:15.123000Z',
+    'author': {'id': str(DOC_ID), 'tags': [str(DOC_ID)]},
+    'stars': 3
+}
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_dumps_encodes_bson_values_at_any_depth(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(serialization, 'orjson', None)
+    assert json.loads(dumps(DOC)) == EXPECTED
+
+def test_dumps_rejects_unknown_types():
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
+def test_jsonify_accepts_raw_documents(client):
+    from flask import jsonify
+    with client.application.app_context():
+        assert json.loads(jsonify({'project': DOC}).data) == {'project': EXPECTED}
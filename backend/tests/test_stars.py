@@ -0,0 +1,27 @@
+from bson import ObjectId
+from conftest import run_concurrently
+
+def test_star_toggle_round_trip(models, make_project):
+    project_id = make_project('p')
+    user_id = ObjectId()
+    assert models.StarModel.toggle_star(user_id, project_id) == (True, 1)
+    assert models.StarModel.toggle_star(user_id, project_id) == (False, 0)
+    assert models.stars_collection.count_documents({}) == 0
+
+def test_star_toggle_on_missing_project_leaves_no_star(models):
+    assert models.StarModel.toggle_star(ObjectId(), ObjectId()) is None
+    assert models.stars_collection.count_documents({}) == 0
+
+def test_concurrent_star_toggles_keep_the_counter_exact(models, make_project):
+    project_id = make_project('p')
+    users = [ObjectId() for _ in range(20)]
+
+    def stars():
+        return models.projects_collection.find_one({'_id': ObjectId(project_id)})['stars']
+
+    # Every user double-clicks: two toggles race for each of them
+    run_concurrently(models.StarModel.toggle_star, [(user, project_id) for user in users for _ in range(2)])
+    assert stars() == models.stars_collection.count_documents({'projectId': ObjectId(project_id)})
+
+    run_concurrently(models.StarModel.toggle_star, [(user, project_id) for user in users])
+    assert stars() == models.stars_collection.count_documents({'projectId': ObjectId(project_id)})
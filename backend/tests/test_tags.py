@@ -0,0 +1,32 @@
+from tags import TagCounter
+
+def test_apply_counts_each_tag_once_per_project(models):
+    counter = TagCounter(models.tag_counts_collection, models.projects_collection)
+    counter.apply(added=['python', 'web', 'python'])
+    counter.apply(added=['python'])
+    assert counter.top() == [{'tag': 'python', 'count': 2}, {'tag': 'web', 'count': 1}]
+
+def test_edits_cancel_out_and_unused_tags_disappear(models):
+    counter = TagCounter(models.tag_counts_collection, models.projects_collection)
+    counter.apply(added=['python', 'web'])
+    assert counter.apply(added=['python', 'go'], removed=['python', 'web']) == 2
+    assert counter.top() == [{'tag': 'go', 'count': 1}, {'tag': 'python', 'count': 1}]
+    assert models.tag_counts_collection.find_one({'_id': 'web'}) is None
+    assert counter.apply(added=['go'], removed=['go']) == 0
+
+def test_top_orders_by_count_then_name_and_limits(models):
+    counter = TagCounter(models.tag_counts_collection, models.projects_collection)
+    for tags in (['b', 'c'], ['a', 'c'], ['c']):
+        counter.apply(added=tags)
+    assert [entry['tag'] for entry in counter.top()] == ['c', 'a', 'b']
+    assert counter.top(limit=1) == [{'tag': 'c', 'count': 3}]
+
+def test_rebuild_recounts_from_projects(models, make_project):
+    counter = TagCounter(models.tag_counts_collection, models.projects_collection)
+    make_project('a', tags=('python', 'web', 'python'))
+    make_project('b', tags=('python',))
+    models.tag_counts_collection.delete_many({})
+    counter.apply(added=['stale'])
+
+    assert counter.rebuild() == 2
+    assert counter.top() == [{'tag': 'python', 'count': 2}, {'tag': 'web', 'count': 1}]
@@ -0,0 +1,59 @@
+from datetime import datetime, timedelta, timezone
+import pytest
+from bson import ObjectId
+from trending import TRENDING_DIRTY_FIELD, TRENDING_SCORE_FIELD, TrendingRanker, trending_score
+
+def test_trending_score_grows_with_stars_and_views():
+    created = datetime(2024, 5, 1)
+    base = trending_score({'createdAt': created})
+    assert trending_score({'createdAt': created, 'stars': 1}) > base
+    assert trending_score({'createdAt': created, 'views': 1}) > base
+
+def test_trending_score_one_half_life_halves_the_weight():
+    created = datetime(2024, 5, 1)
+    older = trending_score({'createdAt': created, 'stars': 5}, half_life_hours=48)
+    newer = trending_score({'createdAt': created + timedelta(hours=48), 'stars': 5}, half_life_hours=48)
+    assert newer - older == pytest.approx(1.0)
+
+def test_trending_score_treats_naive_datetimes_as_utc():
+    naive = datetime(2024, 5, 1, 8)
+    assert trending_score({'createdAt': naive}) == trending_score({'createdAt': naive.replace(tzinfo=timezone.utc)})
+
+def test_refresh_rescores_only_flagged_projects(models, make_project):
+    ranker = TrendingRanker(models.projects_collection)
+    old = make_project('old', datetime(2024, 5, 1))
+    make_project('new', datetime(2024, 5, 3))
+    # New projects are scored on insert
+    assert ranker.refresh() == 0
+    assert [project['title'] for project in ranker.top(2)] == ['new', 'old']
+
+    # Enough stars to outweigh two days of decay
+    models.projects_collection.update_one(
+        {'_id': ObjectId(old)}, {'$set': {'stars': 10, TRENDING_DIRTY_FIELD: True}}
+    )
+    assert ranker.refresh() == 1
+    assert [project['title'] for project in ranker.top(2)] == ['old', 'new']
+    assert models.projects_collection.count_documents({TRENDING_DIRTY_FIELD: True}) == 0
+    assert ranker.refresh() == 0
+
+def test_refresh_keeps_the_flag_of_a_project_that_changed_mid_pass(models, make_project, monkeypatch):
+    project_id = ObjectId(make_project('p', datetime(2024, 5, 1), trendingDirty=True))
+    collection = models.projects_collection
+    find = collection.find
+
+    class StarredAfterRead(list):
+        def batch_size(self, size):
+            # The project gains a star between being read and being rescored
+            monkeypatch.setattr(collection, 'find', find)
+            collection.update_one({'_id': project_id}, {'$inc': {'stars': 1}})
+            return self
+
+    monkeypatch.setattr(collection, 'find', lambda *args: StarredAfterRead(find(*args)))
+    assert TrendingRanker(collection).refresh() == 0
+    assert collection.find_one({'_id': project_id})[TRENDING_DIRTY_FIELD] is True
+
+def test_project_pages_hide_internal_fields(models, make_project):
+    make_project('p')
+    TrendingRanker(models.projects_collection).refresh(rebuild=True)
+    project = models.ProjectModel.list_projects()[0][0]
+    assert not {'searchPrefixes', TRENDING_SCORE_FIELD, TRENDING_DIRTY_FIELD} & set(project)
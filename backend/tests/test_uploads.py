@@ -0,0 +1,100 @@
+import hashlib
+import io
+import os
+from bson import ObjectId
+from werkzeug.datastructures import FileStorage
+from conftest import run_concurrently
+from uploads import remove_stored_file
+from utils import place_stored_file, save_uploaded_file, stage_uploaded_file
+
+def upload(data, filename):
+    return FileStorage(stream=io.BytesIO(data), filename=filename)
+
+def test_identical_uploads_share_one_content_addressed_file(tmp_path):
+    first = save_uploaded_file(upload(b'same bytes', 'a.TXT'), str(tmp_path), {'txt'})
+    second = save_uploaded_file(upload(b'same bytes', 'b.txt'), str(tmp_path), {'txt'})
+    assert first == second == hashlib.sha256(b'same bytes').hexdigest() + '.txt'
+    assert os.listdir(tmp_path) == [first]
+    assert save_uploaded_file(upload(b'x', 'c.exe'), str(tmp_path), {'txt'}) is None
+
+def test_blob_refcount_dedups_and_releases_on_last_reference(models):
+    name = 'a' * 64 + '.png'
+    blob, created = models.UploadModel.acquire_blob(name, 'processing')
+    assert created and blob['refs'] == 1
+    blob, created = models.UploadModel.acquire_blob(name, 'ready')
+    assert not created and blob['refs'] == 2 and blob['status'] == 'processing'
+
+    assert models.UploadModel.release_blob(name) is None
+    assert models.UploadModel.release_blob(name)['_id'] == name
+    assert models.blobs_collection.find_one({'_id': name}) is None
+
+def test_concurrent_uploads_of_the_same_file_create_one_blob(models):
+    name = 'b' * 64 + '.pdf'
+    results = run_concurrently(models.UploadModel.acquire_blob, [(name, 'ready')] * 10)
+    assert sum(created for _, created in results) == 1
+    assert models.blobs_collection.find_one({'_id': name})['refs'] == 10
+
+def stage(tmp_path, data, filename='a.png'):
+    return stage_uploaded_file(upload(data, filename), str(tmp_path), {'png'})
+
+def test_removing_the_last_reference_deletes_the_file_and_its_variants(tmp_path):
+    name, temp_path = stage(tmp_path, b'image')
+    place_stored_file(temp_path, str(tmp_path), name)
+    (tmp_path / (name[:-4] + '-card.webp')).write_bytes(b'variant')
+
+    assert remove_stored_file(str(tmp_path), name, still_needed=lambda: False) is True
+    assert os.listdir(tmp_path) == []
+
+def test_upload_racing_a_delete_keeps_its_file_when_it_checked_first(models, tmp_path):
+    name, temp_path = stage(tmp_path, b'image')
+    place_stored_file(temp_path, str(tmp_path), name)
+    models.UploadModel.acquire_blob(name, 'ready')
+    assert models.UploadModel.release_blob(name)
+
+    # The same bytes arrive after the blob is gone but before the files are:
+    # the upload sees a stored copy and keeps none of its own
+    name, temp_path = stage(tmp_path, b'image')
+    models.UploadModel.acquire_blob(name, 'ready')
+    place_stored_file(temp_path, str(tmp_path), name)
+
+    assert remove_stored_file(str(tmp_path), name, lambda: models.UploadModel.blob_exists(name)) is False
+    assert (tmp_path / name).read_bytes() == b'image'
+    assert os.listdir(tmp_path) == [name]
+
+def test_upload_racing_a_delete_keeps_its_file_when_it_checked_after_the_rename(models, tmp_path):
+    name, temp_path = stage(tmp_path, b'image')
+    place_stored_file(temp_path, str(tmp_path), name)
+    models.UploadModel.acquire_blob(name, 'ready')
+    assert models.UploadModel.release_blob(name)
+
+    def upload_meanwhile():
+        # The upload references the bytes, finds no stored copy and places its own
+        again, staged = stage(tmp_path, b'image')
+        models.UploadModel.acquire_blob(again, 'ready')
+        place_stored_file(staged, str(tmp_path), again)
+        return models.UploadModel.blob_exists(name)
+
+    assert remove_stored_file(str(tmp_path), name, upload_meanwhile) is False
+    assert (tmp_path / name).read_bytes() == b'image'
+    assert os.listdir(tmp_path) == [name]
+
+def test_upload_endpoints_share_and_release_stored_files(client, tmp_path, monkeypatch):
+    from flask_jwt_extended import create_access_token
+    from app import app, upload_processor
+    monkeypatch.setitem(app.config, 'UPLOAD_FOLDER', str(tmp_path))
+    monkeypatch.setattr(upload_processor, 'manifest_path', '')
+    with app.app_context():
+        headers = {'Authorization': 'Bearer ' + create_access_token(identity=str(ObjectId()))}
+
+    ids = []
+    for _ in range(2):
+        response = client.post('/api/uploads', headers=headers, data={'file': (io.BytesIO(b'%PDF'), 'cv.pdf')})
+        assert response.status_code == 201
+        ids.append(response.get_json()['upload']['_id'])
+    name = hashlib.sha256(b'%PDF').hexdigest() + '.pdf'
+    assert os.listdir(tmp_path) == [name]
+
+    assert client.delete(f'/api/uploads/{ids[0]}', headers=headers).status_code == 200
+    assert os.listdir(tmp_path) == [name]
+    assert client.delete(f'/api/uploads/{ids[1]}', headers=headers).status_code == 200
+    assert os.listdir(tmp_path) == []
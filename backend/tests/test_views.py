@@ -0,0 +1,35 @@
+import mongomock
+from bson import ObjectId
+from views import ViewCounter
+
+def test_view_counter_flushes_one_increment_per_project():
+    collection = mongomock.MongoClient().db.projects
+    a, b = collection.insert_one({'views': 0}).inserted_id, collection.insert_one({'views': 2}).inserted_id
+    flushed = []
+    counter = ViewCounter(collection, interval=3600, on_flush=flushed.extend, set_fields={'trendingDirty': True})
+    assert [counter.record(a) for _ in range(3)] == [1, 2, 3]
+    counter.record(b)
+
+    assert counter.flush() == 2
+    assert collection.find_one({'_id': a}) == {'_id': a, 'views': 3, 'trendingDirty': True}
+    assert collection.find_one({'_id': b})['views'] == 3
+    assert sorted(flushed) == sorted([str(a), str(b)])
+    assert counter.pending(a) == 0
+    assert counter.flush() == 0
+    counter.stop()
+
+def test_view_counter_keeps_views_when_a_flush_fails():
+    class FailingCollection:
+        def bulk_write(self, operations, ordered=True):
+            raise RuntimeError('down')
+
+    project_id = ObjectId()
+    counter = ViewCounter(FailingCollection(), interval=3600)
+    counter.record(project_id)
+    counter.record(project_id)
+    assert counter.flush() == 0
+    assert counter.pending(project_id) == 2
+
+    counter.collection = mongomock.MongoClient().db.projects
+    counter.stop()
+    assert counter.pending(project_id) == 0
@@ -0,0 +1,101 @@
+"""Trending project ranking
+
+A project's trending weight is 1 + STAR_WEIGHT * stars + VIEW_WEIGHT * views,
+halved every `half_life_hours` since it was created. Comparing two decayed
+weights at any instant is the same as comparing
+
+    log2(weight) + createdAt / half_life
+
+which does not depend on the current time, so a stored score only goes
+stale when stars or views change. Those writes set TRENDING_DIRTY_FIELD,
+and a periodic pass rescores just the flagged projects:
+
+    python trending.py            # rescore flagged projects every interval
+    python trending.py --once     # one pass, e.g. from cron
+    python trending.py --rebuild  # rescore everything after changing weights
+"""
+import math
+import sys
+import time
+from datetime import timezone
+from pymongo import UpdateOne
+
+STAR_WEIGHT = 3.0
+VIEW_WEIGHT = 0.1
+
+TRENDING_SCORE_FIELD = 'trendingScore'
+TRENDING_DIRTY_FIELD = 'trendingDirty'
+
+# Merge into the $set of any write that changes stars or views
+MARK_TRENDING_DIRTY = {TRENDING_DIRTY_FIELD: True}
+
+# Projects rescored per bulk_write
+RESCORE_BATCH_SIZE = 1000
+
+def trending_score(project, half_life_hours=48):
+    """Time-independent ranking key for a project"""
+    weight = 1 + STAR_WEIGHT * project.get('stars', 0) + VIEW_WEIGHT * project.get('views', 0)
+    created = project['createdAt']
+    if created.tzinfo is None:
+        # Stored datetimes are naive UTC
+        created = created.replace(tzinfo=timezone.utc)
+    created = created.timestamp()
+    return math.log2(weight) + created / (half_life_hours * 3600)
+
+class TrendingRanker:
+    """Keeps trendingScore current on projects_collection"""
+
+    def __init__(self, projects_collection, half_life_hours=48):
+        self.projects = projects_collection
+        self.half_life_hours = half_life_hours
+
+    def create_indexes(self):
+        self.projects.create_index([(TRENDING_SCORE_FIELD, -1)])
+        # Only flagged projects are indexed, since the flag is unset after scoring
+        self.projects.create_index([(TRENDING_DIRTY_FIELD, 1)], sparse=True)
+
+    def score(self, project):
+        return trending_score(project, self.half_life_hours)
+
+    def refresh(self, rebuild=False):
+        """Rescore flagged projects, or every project; returns how many were written
+
+        Each update is conditional on the stars and views it was scored from,
+        so a project that changes mid-pass keeps its flag for the next one.
+        """
+        query = {} if rebuild else {TRENDING_DIRTY_FIELD: True}
+        fields = {'stars': 1, 'views': 1, 'createdAt': 1}
+        written = 0
+        batch = []
+        for project in self.projects.find(query, fields).batch_size(RESCORE_BATCH_SIZE):
+            batch.append(UpdateOne(
+                {'_id': project['_id'], 'stars': project.get('stars', 0), 'views': project.get('views', 0)},
+                {
+                    '$set': {TRENDING_SCORE_FIELD: self.score(project)},
+                    '$unset': {TRENDING_DIRTY_FIELD: ''}
+                }
+            ))
+            if len(batch) == RESCORE_BATCH_SIZE:
+                written += self.projects.bulk_write(batch, ordered=False).modified_count
+                batch = []
+        if batch:
+            written += self.projects.bulk_write(batch, ordered=False).modified_count
+        return written
+
+    def top(self, limit=10, projection=None):
+        """Highest scoring projects, read in index order"""
+        return list(self.projects.find({}, projection)
+                    .sort(TRENDING_SCORE_FIELD, -1)
+                    .limit(limit))
+
+if __name__ == '__main__':
+    from models import trending_ranker
+    from config import Config
+
+    if '--rebuild' in sys.argv or '--once' in sys.argv:
+        count = trending_ranker.refresh(rebuild='--rebuild' in sys.argv)
+        print(f"Rescored {count} projects")
+    else:
+        while True:
+            trending_ranker.refresh()
+            time.sleep(Config.TRENDING_REFRESH_INTERVAL)
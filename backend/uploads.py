@@ -0,0 +1,243 @@
+import json
+import mimetypes
+import os
+import re
+import secrets
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from PIL import Image, ImageOps
+from serialization import dumps
+from utils import save_resized
+
+try:
+    import pillow_avif  # optional dependency, registers the AVIF encoder
+except ImportError:
+    pass
+
+try:
+    import fcntl  # serializes manifest updates across worker processes
+except ImportError:
+    fcntl = None
+
+# Extensions that get resized variants; everything else is stored as-is
+IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'webp'}
+
+# (name, max width, max height), largest first: each variant is resized
+# from the one before it rather than from the full original
+IMAGE_VARIANTS = (
+    ('full', 1600, 1200),
+    ('card', 600, 400),
+    ('thumbnail', 150, 150)
+)
+
+# Suffix of stored files renamed aside while they are being deleted
+DELETED_SUFFIX = '.deleted'
+
+# <sha256>.<ext> and <sha256>-<variant>.<ext>: the name changes whenever
+# the bytes do, so these can be cached forever
+CONTENT_ADDRESSED_NAME = re.compile(r'^[0-9a-f]{64}(-[a-z]+)?\.[a-z0-9]+$')
+IMMUTABLE_MAX_AGE = 365 * 24 * 60 * 60
+
+def variant_formats():
+    """Output formats the installed Pillow can encode"""
+    Image.init()
+    return [fmt for fmt in ('webp', 'avif') if fmt.upper() in Image.SAVE]
+
+def is_image(filename):
+    return filename.rsplit('.', 1)[-1].lower() in IMAGE_EXTENSIONS
+
+def render_variants(source_path, output_folder, stem, url_prefix):
+    """Write every size/format variant of an image, decoding it once
+
+    Returns {variant: {'width', 'height', format: url, ...}}.
+    """
+    formats = variant_formats()
+    variants = {}
+    with Image.open(source_path) as img:
+        # Let JPEG decode straight at the largest size we need, either orientation
+        largest = max(IMAGE_VARIANTS[0][1:])
+        img.draft('RGB', (largest, largest))
+        img = ImageOps.exif_transpose(img)
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+
+        for name, max_width, max_height in IMAGE_VARIANTS:
+            variant = {}
+            for fmt in formats:
+                filename = f'{stem}-{name}.{fmt}'
+                img = save_resized(img, max_width, max_height, os.path.join(output_folder, filename), format=fmt)
+                variant[fmt] = url_prefix + filename
+            variant['width'], variant['height'] = img.size
+            variants[name] = variant
+    return variants
+
+def stored_names(filename):
+    """A stored file's name followed by every variant name it can have"""
+    stem = filename.rsplit('.', 1)[0]
+    return [filename] + [f'{stem}-{name}.{fmt}' for name, _, _ in IMAGE_VARIANTS for fmt in ('webp', 'avif')]
+
+def remove_stored_file(upload_folder, filename, still_needed=None):
+    """Delete a stored file and any variants rendered from it
+
+    The files are renamed aside first. If still_needed() then reports that
+    an upload of the same bytes took a new reference meanwhile, they are put
+    back instead, since that upload only stores its own copy when none is
+    there. Returns whether the files were deleted.
+    """
+    moved = []
+    for name in stored_names(filename):
+        path = os.path.join(upload_folder, name)
+        aside = f'{path}.{secrets.token_hex(4)}{DELETED_SUFFIX}'
+        try:
+            os.rename(path, aside)
+        except FileNotFoundError:
+            continue
+        moved.append((path, aside))
+
+    keep = still_needed is not None and still_needed()
+    for path, aside in moved:
+        if keep and not os.path.exists(path):
+            os.replace(aside, path)
+        else:
+            os.unlink(aside)
+    return not keep
+
+def is_content_addressed(filename):
+    return CONTENT_ADDRESSED_NAME.match(filename) is not None
+
+def cache_headers(filename):
+    """(max_age, etag) to serve a stored file with; None means revalidate"""
+    if is_content_addressed(filename):
+        return IMMUTABLE_MAX_AGE, filename.split('.', 1)[0]
+    return None, True
+
+def manifest_entry(path):
+    """Size, type and Cache-Control of one stored file, or None if it is gone"""
+    try:
+        size = os.stat(path).st_size
+    except FileNotFoundError:
+        return None
+    name = os.path.basename(path)
+    immutable = is_content_addressed(name)
+    return {
+        'size': size,
+        'contentType': mimetypes.guess_type(name)[0] or 'application/octet-stream',
+        'cacheControl': f'public, max-age={IMMUTABLE_MAX_AGE}, immutable' if immutable else 'no-cache'
+    }
+
+def build_manifest(upload_folder):
+    """Manifest entries for every stored file, keyed by name"""
+    manifest = {}
+    with os.scandir(upload_folder) as entries:
+        for entry in entries:
+            if entry.is_file() and not entry.name.endswith(('.part', DELETED_SUFFIX)):
+                manifest[entry.name] = manifest_entry(entry.path)
+    return manifest
+
+def _save_manifest(manifest_path, manifest):
+    # Written to a temporary file and renamed, so readers never see half of it
+    fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(manifest_path)), suffix='.part')
+    with os.fdopen(fd, 'wb') as out:
+        out.write(dumps(manifest))
+    os.replace(temp_path, manifest_path)
+
+def write_manifest(manifest_path, upload_folder):
+    """Rebuild the manifest from a scan of the upload folder"""
+    _save_manifest(manifest_path, build_manifest(upload_folder))
+
+def update_manifest(manifest_path, upload_folder, filenames):
+    """Bring the entries of some stored files and their variants up to date
+
+    Present files are (re)described and missing ones dropped, without
+    rescanning the folder. A lock file serializes workers updating at once.
+    """
+    with open(manifest_path + '.lock', 'a') as lock:
+        if fcntl:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            with open(manifest_path, 'rb') as f:
+                manifest = json.loads(f.read())
+        except FileNotFoundError:
+            manifest = build_manifest(upload_folder)
+        for filename in filenames:
+            for name in stored_names(filename):
+                entry = manifest_entry(os.path.join(upload_folder, name))
+                if entry:
+                    manifest[name] = entry
+                else:
+                    manifest.pop(name, None)
+        _save_manifest(manifest_path, manifest)
+
+class UploadProcessor:
+    """Renders image variants on a background thread pool
+
+    Pillow releases the GIL while resizing and encoding, so a few threads
+    keep request threads free without a separate worker process. The pool
+    starts on first use so it lives in the worker, not a pre-fork master.
+    on_complete(filename, variants, error) is called when done, and the
+    manifest at manifest_path, if given, is kept current.
+    """
+
+    def __init__(self, upload_folder, url_prefix, workers=2, on_complete=None, manifest_path=None):
+        self.upload_folder = upload_folder
+        self.url_prefix = url_prefix
+        self.workers = workers
+        self.on_complete = on_complete
+        self.manifest_path = manifest_path
+        self._executor = None
+        self._lock = threading.Lock()
+        self._manifest_changes = set()
+
+    def _pool(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='upload')
+        return self._executor
+
+    def submit(self, filename):
+        """Queue variant rendering for a stored file"""
+        return self._pool().submit(self._process, filename)
+
+    def refresh_manifest(self, filename):
+        """Queue a manifest update for a stored file; bursts of changes share one"""
+        if not self.manifest_path:
+            return
+        with self._lock:
+            queued = bool(self._manifest_changes)
+            self._manifest_changes.add(filename)
+        if not queued:
+            self._pool().submit(self._update_manifest)
+
+    def _update_manifest(self):
+        with self._lock:
+            filenames, self._manifest_changes = self._manifest_changes, set()
+        update_manifest(self.manifest_path, self.upload_folder, filenames)
+
+    def _process(self, filename):
+        stem = filename.rsplit('.', 1)[0]
+        try:
+            variants = render_variants(
+                os.path.join(self.upload_folder, filename), self.upload_folder, stem, self.url_prefix
+            )
+            error = None
+        except Exception as e:
+            variants, error = None, e
+        if self.on_complete:
+            self.on_complete(filename, variants, error)
+        self.refresh_manifest(filename)
+        return variants
+
+    def shutdown(self, wait=True):
+        """Finish queued renders and stop the pool"""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+# Rebuild the manifest, e.g. after restoring the upload folder from a backup
+if __name__ == '__main__':
+    from config import Config
+    write_manifest(Config.UPLOAD_MANIFEST, Config.UPLOAD_FOLDER)
+    print("Upload manifest written")
@@ -1,41 +1,88 @@
 import os
-import uuid
-from werkzeug.utils import secure_filename
-from PIL import Image
+import tempfile
+from PIL import Image, ImageOps
 import secrets
 import string
+import base64
+import hashlib
+import json
+from datetime import datetime
+from bson import ObjectId
+
+# Bytes copied per read when saving uploads
+UPLOAD_CHUNK_SIZE = 64 * 1024
 
 def allowed_file(filename, allowed_extensions):
     """Check if file extension is allowed"""
     return '.' in filename and \
            filename.rsplit('.', 1)[1].lower() in allowed_extensions
 
-def generate_unique_filename(filename):
-    """Generate a unique filename"""
+def content_filename(digest, filename):
+    """Name a stored file after the hash of its contents"""
     ext = filename.rsplit('.', 1)[1].lower()
-    unique_filename = str(uuid.uuid4()) + '.' + ext
-    return unique_filename
+    return digest + '.' + ext
 
-def save_uploaded_file(file, upload_folder, allowed_extensions):
-    """Save uploaded file with validation"""
+def stage_uploaded_file(file, upload_folder, allowed_extensions):
+    """Stream an upload to a temp file in upload_folder, hashing it on the way
+
+    Returns (stored_filename, temp_path), or None if the type is not allowed;
+    place_stored_file() publishes it under the stored name.
+    """
     if file and allowed_file(file.filename, allowed_extensions):
-        filename = secure_filename(file.filename)
-        unique_filename = generate_unique_filename(filename)
-        file_path = os.path.join(upload_folder, unique_filename)
-        
         # Create directory if it doesn't exist
         os.makedirs(upload_folder, exist_ok=True)
         
-        file.save(file_path)
-        return unique_filename
+        # Write to a temp file first so a partial upload is never visible
+        digest = hashlib.sha256()
+        fd, temp_path = tempfile.mkstemp(dir=upload_folder, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as out:
+                for chunk in iter(lambda: file.stream.read(UPLOAD_CHUNK_SIZE), b''):
+                    digest.update(chunk)
+                    out.write(chunk)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        return content_filename(digest.hexdigest(), file.filename), temp_path
     return None
 
-def resize_image(image_path, max_width=800, max_height=600):
-    """Resize image while maintaining aspect ratio"""
+def place_stored_file(temp_path, upload_folder, stored_filename):
+    """Move a staged upload to its stored name, unless the same bytes are already there"""
+    file_path = os.path.join(upload_folder, stored_filename)
+    if os.path.exists(file_path):
+        # Same bytes are already stored
+        os.unlink(temp_path)
+    else:
+        os.replace(temp_path, file_path)
+
+def save_uploaded_file(file, upload_folder, allowed_extensions):
+    """Save uploaded file with validation, hashing it while streaming to disk
+
+    The file is stored as <sha256>.<ext>, so identical uploads share one copy.
+    """
+    staged = stage_uploaded_file(file, upload_folder, allowed_extensions)
+    if not staged:
+        return None
+    stored_filename, temp_path = staged
+    place_stored_file(temp_path, upload_folder, stored_filename)
+    return stored_filename
+
+def save_resized(img, max_width, max_height, output_path, format=None, quality=85):
+    """Save a downscaled copy of an open image; returns the copy"""
+    resized = img.copy()
+    resized.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
+    resized.save(output_path, format=format, optimize=True, quality=quality)
+    return resized
+
+def resize_image(image_path, max_width=800, max_height=600, output_path=None):
+    """Resize image while maintaining aspect ratio
+
+    Overwrites the original unless output_path is given.
+    """
     try:
         with Image.open(image_path) as img:
-            img.thumbnail((max_width, max_height), Image.Resampling.LANCZOS)
-            img.save(image_path, optimize=True, quality=85)
+            img = ImageOps.exif_transpose(img)
+            save_resized(img, max_width, max_height, output_path or image_path)
         return True
     except Exception as e:
         print(f"Error resizing image: {e}")
@@ -46,17 +93,41 @@ def generate_random_string(length=32):
     alphabet = string.ascii_letters + string.digits
     return ''.join(secrets.choice(alphabet) for _ in range(length))
 
-def serialize_doc(doc):
-    """Convert MongoDB document to JSON serializable format"""
-    if doc is None:
-        return None
-    if '_id' in doc:
-        doc['_id'] = str(doc['_id'])
-    return doc
+def encode_cursor(created_at, doc_id):
+    """Encode a (createdAt, _id) sort key into an opaque pagination cursor"""
+    payload = json.dumps({'t': created_at.isoformat(), 'id': str(doc_id)})
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+def decode_cursor(cursor):
+    """Decode a pagination cursor back into its (createdAt, _id) sort key"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(payload['t']), ObjectId(payload['id'])
+    except Exception:
+        raise ValueError('Invalid cursor')
+
+def keyset_filter(created_at, doc_id, older=True, id_field='_id'):
+    """Filter for rows strictly before (or after) a (createdAt, _id) sort key"""
+    op = '$lt' if older else '$gt'
+    return {'$or': [
+        {'createdAt': {op: created_at}},
+        {'createdAt': created_at, id_field: {op: doc_id}}
+    ]}
+
+def json_default(value):
+    """json.dumps fallback for BSON values"""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, datetime):
+        # Naive datetimes from PyMongo are UTC
+        return value.isoformat() + ('Z' if value.tzinfo is None else '')
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
 
-def serialize_docs(docs):
-    """Convert list of MongoDB documents to JSON serializable format"""
-    return [serialize_doc(doc) for doc in docs]
+def make_etag(*parts):
+    """Stable entity tag for a tuple of version values"""
+    payload = json.dumps(parts, default=json_default, sort_keys=True)
+    return hashlib.sha1(payload.encode()).hexdigest()
 
 def validate_email(email):
     """Basic email validation"""
@@ -0,0 +1,88 @@
+import atexit
+import threading
+from collections import Counter
+from bson import ObjectId
+from pymongo import UpdateOne
+
+class ViewCounter:
+    """Write-behind buffer for project view increments
+
+    Views are counted in memory and flushed as one unordered bulk_write of
+    $inc operations every `interval` seconds and at interpreter shutdown.
+    `on_flush`, if given, is called with the flushed project ids; `set_fields`
+    are $set alongside each increment.
+    """
+
+    def __init__(self, collection, interval=5, on_flush=None, set_fields=None):
+        self.collection = collection
+        self.interval = interval
+        self.on_flush = on_flush
+        self.set_fields = set_fields
+        self._pending = Counter()
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    def record(self, project_id):
+        """Buffer one view and return the number of views not yet flushed"""
+        self._ensure_started()
+        with self._lock:
+            self._pending[str(project_id)] += 1
+            return self._pending[str(project_id)]
+
+    def pending(self, project_id):
+        """Number of buffered views for a project"""
+        with self._lock:
+            return self._pending.get(str(project_id), 0)
+
+    def flush(self):
+        """Write all buffered increments in a single bulk_write"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._pending = self._pending, Counter()
+            if not batch:
+                return 0
+
+            operations = [
+                UpdateOne({'_id': ObjectId(project_id)}, self._update(count))
+                for project_id, count in batch.items()
+            ]
+            try:
+                self.collection.bulk_write(operations, ordered=False)
+            except Exception as e:
+                # Put the views back so the next flush retries them
+                with self._lock:
+                    self._pending.update(batch)
+                print(f"Error flushing view counts: {e}")
+                return 0
+            if self.on_flush:
+                self.on_flush(list(batch))
+            return len(operations)
+
+    def _update(self, count):
+        update = {'$inc': {'views': count}}
+        if self.set_fields:
+            update['$set'] = self.set_fields
+        return update
+
+    def stop(self):
+        """Stop the flusher thread and write whatever is still buffered"""
+        self._stopped.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval)
+        self.flush()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name='view-counter', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def _run(self):
+        while not self._stopped.wait(self.interval):
+            self.flush()
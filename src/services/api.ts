@@ -58,6 +58,26 @@ export interface Conversation {
   };
 }
 
+export interface UploadVariant {
+  width: number;
+  height: number;
+  webp?: string;
+  avif?: string;
+}
+
+export interface Upload {
+  _id: string;
+  filename: string;
+  originalName: string;
+  contentType: string;
+  size: number;
+  url: string;
+  status: 'processing' | 'ready' | 'failed';
+  error?: string;
+  variants: Partial<Record<'full' | 'card' | 'thumbnail', UploadVariant>>;
+  createdAt: string;
+}
+
 export interface Message {
   _id: string;
   conversationId: string;
@@ -151,6 +171,7 @@ class ApiService {
     total: number;
     page: number;
     pages: number;
+    approximate?: boolean;
   }> {
     const queryParams = new URLSearchParams();
     if (params?.page) queryParams.append('page', params.page.toString());
@@ -191,6 +212,17 @@ class ApiService {
     return this.handleResponse<{ following: boolean }>(response);
   }
 
+  async getSuggestions(limit?: number): Promise<{ users: (User & { mutual: number })[] }> {
+    const queryParams = new URLSearchParams();
+    if (limit) queryParams.append('limit', limit.toString());
+
+    const response = await fetch(`${API_BASE_URL}/suggestions?${queryParams}`, {
+      headers: this.getAuthHeaders()
+    });
+    
+    return this.handleResponse<{ users: (User & { mutual: number })[] }>(response);
+  }
+
   // Project APIs
   async getProjects(params?: {
     page?: number;
@@ -203,6 +235,8 @@ class ApiService {
     total: number;
     page: number;
     pages: number;
+    approximate?: boolean;
+    nextCursor?: string | null;
   }> {
     const queryParams = new URLSearchParams();
     if (params?.page) queryParams.append('page', params.page.toString());
@@ -218,6 +252,43 @@ class ApiService {
     return this.handleResponse(response);
   }
 
+  async getTags(limit?: number): Promise<{ tags: { tag: string; count: number }[]; total: number }> {
+    const queryParams = new URLSearchParams();
+    if (limit) queryParams.append('limit', limit.toString());
+
+    const response = await fetch(`${API_BASE_URL}/tags?${queryParams}`, {
+      headers: this.getAuthHeaders()
+    });
+    
+    return this.handleResponse<{ tags: { tag: string; count: number }[]; total: number }>(response);
+  }
+
+  async getTrendingProjects(limit?: number): Promise<{ projects: Project[] }> {
+    const queryParams = new URLSearchParams();
+    if (limit) queryParams.append('limit', limit.toString());
+
+    const response = await fetch(`${API_BASE_URL}/projects/trending?${queryParams}`, {
+      headers: this.getAuthHeaders()
+    });
+    
+    return this.handleResponse<{ projects: Project[] }>(response);
+  }
+
+  async getFeed(params?: {
+    limit?: number;
+    cursor?: string;
+  }): Promise<{ projects: Project[]; nextCursor: string | null }> {
+    const queryParams = new URLSearchParams();
+    if (params?.limit) queryParams.append('limit', params.limit.toString());
+    if (params?.cursor) queryParams.append('cursor', params.cursor);
+
+    const response = await fetch(`${API_BASE_URL}/feed?${queryParams}`, {
+      headers: this.getAuthHeaders()
+    });
+    
+    return this.handleResponse<{ projects: Project[]; nextCursor: string | null }>(response);
+  }
+
   async createProject(projectData: {
     title: string;
     description: string;
@@ -243,6 +314,17 @@ class ApiService {
     return this.handleResponse<{ project: Project }>(response);
   }
 
+  async getRelatedProjects(projectId: string, limit?: number): Promise<{ projects: (Project & { similarity: number })[] }> {
+    const queryParams = new URLSearchParams();
+    if (limit) queryParams.append('limit', limit.toString());
+
+    const response = await fetch(`${API_BASE_URL}/projects/${projectId}/related?${queryParams}`, {
+      headers: this.getAuthHeaders()
+    });
+    
+    return this.handleResponse<{ projects: (Project & { similarity: number })[] }>(response);
+  }
+
   async toggleProjectStar(projectId: string): Promise<{ starred: boolean; stars: number }> {
     const response = await fetch(`${API_BASE_URL}/projects/${projectId}/star`, {
       method: 'POST',
@@ -271,12 +353,21 @@ class ApiService {
     return this.handleResponse<{ conversation: Conversation }>(response);
   }
 
-  async getMessages(conversationId: string): Promise<{ messages: Message[] }> {
-    const response = await fetch(`${API_BASE_URL}/conversations/${conversationId}/messages`, {
+  async getMessages(conversationId: string, params?: {
+    limit?: number;
+    before?: string;
+    since?: string;
+  }): Promise<{ messages: Message[]; hasMore: boolean }> {
+    const queryParams = new URLSearchParams();
+    if (params?.limit) queryParams.append('limit', params.limit.toString());
+    if (params?.before) queryParams.append('before', params.before);
+    if (params?.since) queryParams.append('since', params.since);
+
+    const response = await fetch(`${API_BASE_URL}/conversations/${conversationId}/messages?${queryParams}`, {
       headers: this.getAuthHeaders()
     });
     
-    return this.handleResponse<{ messages: Message[] }>(response);
+    return this.handleResponse<{ messages: Message[]; hasMore: boolean }>(response);
   }
 
   async sendMessage(conversationId: string, content: string): Promise<{ messageData: Message }> {
@@ -289,6 +380,39 @@ class ApiService {
     return this.handleResponse<{ messageData: Message }>(response);
   }
 
+  // Upload APIs
+  async uploadFile(file: File): Promise<{ upload: Upload }> {
+    const token = localStorage.getItem('authToken');
+    const formData = new FormData();
+    formData.append('file', file);
+    
+    // Let the browser set the multipart boundary
+    const response = await fetch(`${API_BASE_URL}/uploads`, {
+      method: 'POST',
+      headers: token ? { 'Authorization': `Bearer ${token}` } : {},
+      body: formData
+    });
+    
+    return this.handleResponse<{ upload: Upload }>(response);
+  }
+
+  async getUpload(uploadId: string): Promise<{ upload: Upload }> {
+    const response = await fetch(`${API_BASE_URL}/uploads/${uploadId}`, {
+      headers: this.getAuthHeaders()
+    });
+    
+    return this.handleResponse<{ upload: Upload }>(response);
+  }
+
+  async deleteUpload(uploadId: string): Promise<{ message: string }> {
+    const response = await fetch(`${API_BASE_URL}/uploads/${uploadId}`, {
+      method: 'DELETE',
+      headers: this.getAuthHeaders()
+    });
+    
+    return this.handleResponse<{ message: string }>(response);
+  }
+
   // Health check
   async healthCheck(): Promise<{ status: string; timestamp: string }> {
     const response = await fetch(`${API_BASE_URL}/health`);